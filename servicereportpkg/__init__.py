@@ -17,8 +17,35 @@ from argparse import ArgumentParser
 
 from servicereportpkg.repair import Repair
 from servicereportpkg.validate import Validate
-from servicereportpkg.logger import setup_logger
-from servicereportpkg.report import generate_report
+from servicereportpkg.logger import setup_logger, shutdown_logger
+from servicereportpkg.logger import add_log_filter
+from servicereportpkg.log_dedup import LogDedupFilter, LOG_DEDUP_INTERVAL
+from servicereportpkg.results import save_results, load_results
+from servicereportpkg.results import get_machine_id, get_validation_results
+from servicereportpkg.cache import load_cached_results, save_cached_results
+from servicereportpkg.cache import invalidate_cached_results, start_refresh
+from servicereportpkg.cache import get_results_age
+from servicereportpkg.run_lock import RunLock
+from servicereportpkg.report import get_reporter, REPORT_FORMATS
+from servicereportpkg.report import get_run_status
+from servicereportpkg.history import history_main, record_history
+from servicereportpkg.history import print_changes
+from servicereportpkg.prometheus import write_prometheus_textfile
+from servicereportpkg.timings import enable_timings, print_hot_spots, timed
+from servicereportpkg.timings import enable_tracing
+from servicereportpkg.trace import write_trace
+from servicereportpkg.profiling import enable_profiling, profiled
+from servicereportpkg.profiling import write_profiles, print_profile_summary
+from servicereportpkg.profiling import PROFILE_TOP
+from servicereportpkg.memory import enable_memory_accounting, accounted
+from servicereportpkg.memory import parse_memory_budget, print_memory_usage
+from servicereportpkg.watch import Watcher, WATCH_POLL_INTERVAL
+from servicereportpkg.watch import WATCH_CHECK_INTERVAL
+from servicereportpkg.service import QueryService, query_main
+from servicereportpkg.service import SERVICE_SOCKET
+from servicereportpkg.validate.plugins.spyre import set_spyre_sizing
+from servicereportpkg.validate.plugins.spyre import SPYRE_DMA_WINDOW_KB
+from servicereportpkg.validate.plugins.spyre import SPYRE_MEMLOCK_RAM_SHARE
 from servicereportpkg.global_context import TOOL_NAME
 from servicereportpkg.logger import get_default_logger
 from servicereportpkg.utils import trigger_kernel_crash
@@ -31,8 +58,11 @@ __version__ = '2.2.4'
 def parse_commandline_args(args):
     """Command line argument parser"""
 
+    # Without abbreviations the cache options are recognized and left out
+    # of the command line of the detached refresh
     parser = ArgumentParser(description="Validation tool to \
-                                        verify the system configurations")
+                                        verify the system configurations",
+                            allow_abbrev=False)
 
     parser.add_argument("-a", "--all", action="store_true",
                         dest="all", default=False,
@@ -66,6 +96,135 @@ def parse_commandline_args(args):
                         dest="repair", default=False,
                         help="Auto fix the incorrection configurations")
 
+    parser.add_argument("--resume", action="store_true",
+                        dest="resume", default=False,
+                        help="resume the interrupted repair run, skip the "
+                             "repair actions completed by it")
+
+    parser.add_argument("--save", dest="save_results",
+                        metavar="RESULTS_FILE", default=None,
+                        help="save the validation results to RESULTS_FILE")
+
+    parser.add_argument("--from", dest="results_from",
+                        metavar="RESULTS_FILE", default=None,
+                        help="repair using the validation results saved in "
+                             "RESULTS_FILE, only the checks whose inputs "
+                             "changed are validated again")
+
+    parser.add_argument("--dedup", action="store_true",
+                        dest="dedup", default=False,
+                        help="log the messages of a check only if they "
+                             "changed since the previous run or were not "
+                             "logged within the dedup interval")
+
+    parser.add_argument("--dedup-interval", dest="dedup_interval",
+                        metavar="SECONDS", type=int,
+                        default=LOG_DEDUP_INTERVAL,
+                        help="log the repeated messages again after "
+                             "SECONDS, default %(default)s")
+
+    parser.add_argument("--format", dest="format", choices=REPORT_FORMATS,
+                        default="console",
+                        help="report format, json writes the whole run as "
+                             "one document, ndjson writes one record per "
+                             "check as soon as its plugin completes")
+
+    parser.add_argument("--watch", action="store_true",
+                        dest="watch", default=False,
+                        help="keep running after the validation and "
+                             "validate again the checks whose inputs change")
+
+    parser.add_argument("--watch-interval", dest="watch_interval",
+                        metavar="SECONDS", type=int,
+                        default=WATCH_POLL_INTERVAL,
+                        help="poll the sysfs and procfs inputs every "
+                             "SECONDS in watch mode, default %(default)s")
+
+    parser.add_argument("--watch-check-interval",
+                        dest="watch_check_interval", metavar="SECONDS",
+                        type=int, default=WATCH_CHECK_INTERVAL,
+                        help="validate the checks without inputs every "
+                             "SECONDS in watch mode, default %(default)s")
+
+    parser.add_argument("--serve", action="store_true",
+                        dest="serve", default=False,
+                        help="answer the queries for the validation "
+                             "results on %s" % SERVICE_SOCKET)
+
+    parser.add_argument("--max-age", dest="max_age", metavar="SECONDS",
+                        type=float, default=None,
+                        help="print the results of the previous run "
+                             "if they are younger than SECONDS")
+
+    parser.add_argument("--stale-while-revalidate", action="store_true",
+                        dest="stale_while_revalidate", default=False,
+                        help="print the older results of the previous run "
+                             "as well and refresh them in the background")
+
+    parser.add_argument("--changed-since-last", action="store_true",
+                        dest="changed_since_last", default=False,
+                        help="list the checks whose status changed since "
+                             "the previous run")
+
+    parser.add_argument("--prometheus-textfile", dest="prometheus_textfile",
+                        metavar="DIR", default=None,
+                        help="write the check status and the metrics of the "
+                             "run to DIR/servicereport.prom for the node "
+                             "exporter textfile collector")
+
+    parser.add_argument("--timings", action="store_true",
+                        dest="timings", default=False,
+                        help="record the time, the processes spawned and the "
+                             "files read by every check, repair action and "
+                             "phase of the run, and print the slowest first")
+
+    parser.add_argument("--memory-budget", dest="memory_budget",
+                        metavar="[PLUGIN=]MB", action="append",
+                        type=parse_memory_budget, default=None,
+                        help="report the plugins whose peak memory exceeds "
+                             "MB, PLUGIN=MB sets the budget of a plugin, "
+                             "may be repeated")
+
+    parser.add_argument("--memory-budget-abort", action="store_true",
+                        dest="memory_budget_abort", default=False,
+                        help="abort the run once a plugin exceeds its "
+                             "memory budget")
+
+    parser.add_argument("--trace", dest="trace_file", metavar="TRACE_FILE",
+                        default=None,
+                        help="write the timeline of the run to TRACE_FILE "
+                             "as Chrome trace events, viewable in Perfetto")
+
+    parser.add_argument("--profile", dest="profile_dir", metavar="DIR",
+                        default=None,
+                        help="profile the plugin discovery, every plugin and "
+                             "every repair plugin with cProfile and write a "
+                             "pstats file for each of them to DIR")
+
+    parser.add_argument("--profile-top", dest="profile_top", metavar="N",
+                        type=int, default=PROFILE_TOP,
+                        help="number of functions listed in the profile "
+                             "summary, default %(default)s")
+
+    parser.add_argument("--spyre-dma-window", dest="spyre_dma_window",
+                        metavar="MB", type=int,
+                        default=SPYRE_DMA_WINDOW_KB // 1024,
+                        help="DMA window pinned for each spyre card, the "
+                             "memlock limit is sized from it, default "
+                             "%(default)s")
+
+    parser.add_argument("--spyre-memlock-share", dest="spyre_memlock_share",
+                        metavar="PERCENT", type=int,
+                        default=int(SPYRE_MEMLOCK_RAM_SHARE * 100),
+                        help="share of the RAM the spyre cards may pin, "
+                             "default %(default)s")
+
+    parser.add_argument("--spyre-hugepages", dest="spyre_hugepages",
+                        metavar="MB", type=int, default=0,
+                        help="hugepages needed by each spyre card, a pool "
+                             "smaller than that is reported, default "
+                             "%(default)s")
+
     parser.add_argument("-V", "--version", action="store_true",
                         dest="cmdarg_version", default=False,
                         help="print the tool version and exit")
@@ -85,6 +244,78 @@ def parse_commandline_args(args):
         parser.error("-a(--all) option is not allowd with -p(--plugins)\n"
                      "\t\t\tor -o(--optional) option.")
 
+    if parsed_argument.resume and not parsed_argument.repair:
+        parser.error("--resume option is allowed only with -r(--repair)")
+
+    if parsed_argument.results_from and not parsed_argument.repair:
+        parser.error("--from option is allowed only with -r(--repair)")
+
+    if parsed_argument.memory_budget_abort and \
+            not parsed_argument.memory_budget:
+        parser.error("--memory-budget-abort option is allowed only with "
+                     "--memory-budget")
+
+    if parsed_argument.profile_top <= 0:
+        parser.error("--profile-top must be a positive number")
+
+    if parsed_argument.watch and (parsed_argument.repair or
+                                  parsed_argument.dump):
+        parser.error("--watch option is not allowed with -r(--repair) or "
+                     "-d(--dump)")
+
+    if (parsed_argument.watch or parsed_argument.serve) and \
+            (parsed_argument.timings or parsed_argument.trace_file or
+             parsed_argument.profile_dir):
+        parser.error("--timings, --trace and --profile options are not "
+                     "allowed with --watch or --serve")
+
+    if parsed_argument.watch and parsed_argument.format == "json":
+        parser.error("--watch option is not allowed with --format json, "
+                     "use --format ndjson")
+
+    if parsed_argument.serve and (parsed_argument.repair or
+                                  parsed_argument.dump or
+                                  parsed_argument.watch):
+        parser.error("--serve option is not allowed with -r(--repair), "
+                     "-d(--dump) or --watch")
+
+    # The cached results are reported as they are, the options acting on
+    # a validation would be ignored
+    if parsed_argument.max_age is not None and \
+            (not is_report_only(parsed_argument) or parsed_argument.serve):
+        parser.error("--max-age option is not allowed with -r(--repair), "
+                     "-d(--dump), --watch, --serve, --save, "
+                     "--prometheus-textfile, --timings, --trace, --profile, "
+                     "--memory-budget or --changed-since-last")
+
+    if parsed_argument.max_age is not None and parsed_argument.max_age < 0:
+        parser.error("--max-age must not be negative")
+
+    if parsed_argument.stale_while_revalidate and \
+            parsed_argument.max_age is None:
+        parser.error("--stale-while-revalidate option is allowed only with "
+                     "--max-age")
+
+    if parsed_argument.spyre_dma_window <= 0:
+        parser.error("--spyre-dma-window must be a positive number of MB")
+
+    if not 0 < parsed_argument.spyre_memlock_share <= 100:
+        parser.error("--spyre-memlock-share must be a percentage between 1 "
+                     "and 100")
+
+    if parsed_argument.spyre_hugepages < 0:
+        parser.error("--spyre-hugepages must not be negative")
+
+    if parsed_argument.watch_interval <= 0:
+        parser.error("--watch-interval must be a positive number of seconds")
+
+    if parsed_argument.watch_check_interval <= 0:
+        parser.error("--watch-check-interval must be a positive number of "
+                     "seconds")
+
+    if parsed_argument.dedup_interval <= 0:
+        parser.error("--dedup-interval must be a positive number of seconds")
+
     return parser.parse_args(args)
 
 
@@ -106,6 +337,34 @@ def get_dump_plugin(validation_results):
     return None
 
 
+def report_cached_results(results, reporter):
+    """Report the cached results, returns the exit code of the run that
+    validated them"""
+
+    validation_results = get_validation_results(results)
+
+    print("Results of the run at %s\n"
+          % time.strftime("%Y-%m-%d %H:%M:%S",
+                          time.localtime(results["created"])))
+
+    for plugin_name in validation_results:
+        reporter.plugin_completed(plugin_name, validation_results[plugin_name])
+    reporter.finish(validation_results)
+
+    return 0 if get_run_status(validation_results) else 1
+
+
+def is_report_only(cmd_opts):
+    """Returns True if the run only reports the validation results, such
+    a run can report the results of a concurrent run"""
+
+    return not (cmd_opts.repair or cmd_opts.dump or cmd_opts.watch or
+                cmd_opts.save_results or cmd_opts.prometheus_textfile or
+                cmd_opts.timings or cmd_opts.trace_file or
+                cmd_opts.profile_dir or cmd_opts.memory_budget or
+                cmd_opts.changed_since_last)
+
+
 def is_arch_supported():
     """Returns True if the tool supports current architecture else False"""
 
@@ -119,12 +378,23 @@ def is_arch_supported():
 def main():
     """Entry point of ServiceReport tool"""
 
+    if len(sys.argv) > 1 and sys.argv[1] == "history":
+        return history_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        return query_main(sys.argv[2:])
+
     cmd_opts = parse_commandline_args(sys.argv[1:])
 
     if not is_arch_supported():
         print("\nUnsupported Architecure!")
         return 1
 
+    report_stream = sys.stdout
+    if cmd_opts.format != "console":
+        # The standard output is reserved for the machine readable report
+        sys.stdout = sys.stderr
+
     log = setup_logger(cmd_opts.log_file, cmd_opts.verbose)
 
     print(TOOL_NAME + " " + get_version()+"\n")
@@ -139,21 +409,145 @@ def main():
     if cmd_opts.quite:
         sys.stdout = open(os.devnull, 'a')
         sys.stderr = open(os.devnull, 'a')
+        report_stream = sys.stdout
+
+    reporter = get_reporter(cmd_opts, report_stream, get_version())
+
+    if cmd_opts.max_age is not None:
+        results = load_cached_results(cmd_opts, get_version())
+        if results is not None:
+            if get_results_age(results) < cmd_opts.max_age:
+                return report_cached_results(results, reporter)
+
+            if cmd_opts.stale_while_revalidate:
+                start_refresh(sys.argv[1:])
+                return report_cached_results(results, reporter)
 
-    validator = Validate(cmd_opts)
+    if cmd_opts.timings:
+        enable_timings()
+
+    if cmd_opts.trace_file:
+        enable_tracing()
+
+    if cmd_opts.timings or cmd_opts.memory_budget:
+        enable_memory_accounting(snapshots=cmd_opts.timings)
+
+    if cmd_opts.profile_dir:
+        enable_profiling(cmd_opts.profile_dir)
+
+    set_spyre_sizing(cmd_opts.spyre_dma_window * 1024,
+                     cmd_opts.spyre_memlock_share / 100,
+                     cmd_opts.spyre_hugepages * 1024)
+
+    log_dedup = None
+    if cmd_opts.dedup:
+        log_dedup = LogDedupFilter(cmd_opts.dedup_interval)
+        add_log_filter(log_dedup)
+
+    if cmd_opts.serve:
+        return QueryService(cmd_opts, get_version()).run()
+
+    with profiled("discovery"), accounted("discovery"):
+        validator = Validate(cmd_opts)
+    validator.set_reporter(reporter)
 
     if cmd_opts.list_plugins:
         validator.list_applicable_plugins()
         return 0
 
-    validation_results = validator.validate()
-    log.debug("Completed the validation.")
-
-    if cmd_opts.repair:
-        Repair(cmd_opts).repair(validation_results)
+    # A run waiting for a concurrent run reports its results, the repairs
+    # are serialized and validate the system once the other run is over
+    run_lock = RunLock()
+    if run_lock.acquire() and is_report_only(cmd_opts):
+        results = load_cached_results(cmd_opts, get_version())
+        if results is not None and \
+                results["created"] >= run_lock.get_wait_started():
+            run_lock.release()
+            return report_cached_results(results, reporter)
+
+    if cmd_opts.results_from:
+        try:
+            results = load_results(cmd_opts.results_from)
+        except (IOError, ValueError) as exception:
+            print("Unable to load the results from %s: %s"
+                  % (cmd_opts.results_from, exception))
+            return 1
+
+        if results["machine_id"] != get_machine_id():
+            print("%s holds the results of a different system"
+                  % cmd_opts.results_from)
+            return 1
+
+        validation_results = validator.revalidate_results(results)
+        log.debug("Loaded the validation results from %s",
+                  cmd_opts.results_from)
+    else:
+        validation_results = validator.validate()
+        log.debug("Completed the validation.")
+
+    if cmd_opts.save_results:
+        if not save_results(cmd_opts.save_results, validation_results,
+                            get_version()):
+            print("Failed to save the results to %s" % cmd_opts.save_results)
+
+    if validator.is_aborted():
+        print("Validation aborted, a plugin exceeded its memory budget")
+    elif cmd_opts.repair:
+        with profiled("discovery"):
+            repair = Repair(cmd_opts)
+        repair.repair(validation_results)
         log.debug("Completed the repair.")
+        # The cached results no more describe the system
+        invalidate_cached_results()
+    else:
+        save_cached_results(validation_results, cmd_opts, get_version())
+    run_lock.release()
+
+    if log_dedup is not None:
+        log_dedup.complete()
+
+    changes = record_history(validation_results, get_version(),
+                             cmd_opts.repair,
+                             get_run_status(validation_results),
+                             cmd_opts.changed_since_last)
+
+    if cmd_opts.prometheus_textfile:
+        write_prometheus_textfile(cmd_opts.prometheus_textfile,
+                                  validation_results,
+                                  reporter.plugin_durations)
+
+    with timed("phase", "report rendering"):
+        reporter.finish(validation_results)
+
+    if cmd_opts.timings:
+        print_hot_spots()
+        print_memory_usage()
+
+    for (plugin, used, budget) in validator.get_over_budget():
+        print("%s plugin used %.1f MB of memory, exceeding its budget of "
+              "%.1f MB" % (plugin, used / 1024 / 1024, budget / 1024 / 1024))
+
+    if cmd_opts.trace_file:
+        if not write_trace(cmd_opts.trace_file, get_version()):
+            print("Failed to write the trace to %s" % cmd_opts.trace_file)
+
+    if cmd_opts.profile_dir:
+        if not write_profiles():
+            print("Failed to write the profiles to %s" % cmd_opts.profile_dir)
+        print_profile_summary(cmd_opts.profile_top)
+
+    if cmd_opts.changed_since_last:
+        if changes is None:
+            print("No previous run recorded")
+        else:
+            print("Changes since the last run:\n")
+            print_changes(changes)
+
+    if validator.is_aborted():
+        return 1
 
-    generate_report(validation_results, cmd_opts)
+    if cmd_opts.watch:
+        return Watcher(validation_results, reporter, cmd_opts).run()
 
     if cmd_opts.dump:
         dump_plugins = get_dump_plugin(validation_results)
@@ -163,6 +557,8 @@ def main():
                     return 1
             print("About to crash the kernel, press Ctrl+c to stop")
             time.sleep(5)
+            # Nothing queued after this point survives the crash
+            shutdown_logger()
             trigger_kernel_crash()
         else:
             log.warning("Dump plugin not found, dummy dump not initiated")
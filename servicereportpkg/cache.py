@@ -0,0 +1,168 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Results of the latest validation cached under /run, reused by the runs
+given --max-age as long as they are younger than that age. The stale
+results can be served while a detached run refreshes them."""
+
+
+import os
+import sys
+import glob
+import json
+import time
+import fcntl
+import hashlib
+import subprocess
+
+from servicereportpkg.results import get_results_dict, get_machine_id
+from servicereportpkg.results import RESULTS_VERSION
+from servicereportpkg.global_context import RUN_DIR
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.file_manager import write_file_atomic
+
+
+# Results of every plugin selection are cached in a separate file
+CACHE_FILE_PATTERN = RUN_DIR + "/results-%s.json"
+
+# Held by the detached run refreshing the cached results
+REFRESH_LOCK = RUN_DIR + "/refresh.lock"
+
+# Options left out of the command line of the detached refresh
+CACHE_OPTIONS = ("--max-age", "--stale-while-revalidate")
+
+
+def get_selection(cmd_opts):
+    """Returns the plugin selection of the command line, the cached
+    results are reused only by the runs selecting the same plugins"""
+
+    return {"all": bool(cmd_opts.all),
+            "plugins": sorted(cmd_opts.plugins or []),
+            "optional": sorted(cmd_opts.optional or [])}
+
+
+def get_cache_file(cmd_opts):
+    """Returns the file caching the results of the plugin selection"""
+
+    selection = json.dumps(get_selection(cmd_opts), sort_keys=True)
+    return CACHE_FILE_PATTERN % hashlib.sha1(
+        selection.encode("utf-8")).hexdigest()[:16]
+
+
+def save_cached_results(validation_results, cmd_opts, tool_version):
+    """Cache the results of the validation, returns True on success"""
+
+    results = get_results_dict(validation_results, tool_version)
+    results["selection"] = get_selection(cmd_opts)
+
+    cache_file = get_cache_file(cmd_opts)
+    if not write_file_atomic(cache_file, json.dumps(results)):
+        get_default_logger().debug("Failed to cache the results in %s",
+                                   cache_file)
+        return False
+
+    return True
+
+
+def invalidate_cached_results():
+    """Remove the cached results of every plugin selection, e.g. once the
+    system is repaired"""
+
+    for cache_file in glob.glob(CACHE_FILE_PATTERN % "*"):
+        try:
+            os.remove(cache_file)
+        except FileNotFoundError:
+            pass
+        except OSError as os_error:
+            get_default_logger().warning("Failed to remove the cached "
+                                         "results %s, error: %s",
+                                         cache_file, os_error)
+
+
+def load_cached_results(cmd_opts, tool_version):
+    """Returns the cached results if they were validated by this version
+    of the tool for the same plugin selection, else None"""
+
+    cache_file = get_cache_file(cmd_opts)
+    try:
+        with open(cache_file, "r", encoding="utf-8") as o_file:
+            results = json.load(o_file)
+    except (IOError, OSError, ValueError) as exception:
+        get_default_logger().debug("No cached results in %s: %s",
+                                   cache_file, exception)
+        return None
+
+    if not isinstance(results, dict) or \
+            results.get("version") != RESULTS_VERSION or \
+            results.get("tool_version") != tool_version or \
+            results.get("machine_id") != get_machine_id() or \
+            results.get("selection") != get_selection(cmd_opts):
+        return None
+
+    return results
+
+
+def get_results_age(results):
+    """Returns the age of the results in seconds"""
+
+    return time.time() - results["created"]
+
+
+def get_refresh_args(args):
+    """Returns the command line arguments without the cache options"""
+
+    refresh_args = []
+    skip_value = False
+
+    for arg in args:
+        if skip_value:
+            skip_value = False
+            continue
+
+        option = arg.split("=", 1)[0]
+        if option not in CACHE_OPTIONS:
+            refresh_args.append(arg)
+        elif option == "--max-age" and "=" not in arg:
+            skip_value = True
+
+    return refresh_args
+
+
+def start_refresh(args):
+    """Start a detached run of the tool with the given command line
+    arguments, it refreshes the cached results. Returns False if a
+    refresh is already running or it could not be started."""
+
+    log = get_default_logger()
+
+    try:
+        os.makedirs(RUN_DIR, exist_ok=True)
+        lock_fd = os.open(REFRESH_LOCK, os.O_WRONLY | os.O_CREAT, 0o600)
+    except OSError as os_error:
+        log.warning("Failed to open %s, error: %s", REFRESH_LOCK, os_error)
+        return False
+
+    try:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            log.debug("The cached results are already being refreshed")
+            return False
+
+        # The lock is held by the detached run until it exits
+        subprocess.Popen([sys.executable, os.path.abspath(sys.argv[0])] +
+                         get_refresh_args(args),
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, pass_fds=(lock_fd,),
+                         start_new_session=True)
+    except OSError as os_error:
+        log.warning("Failed to refresh the cached results, error: %s",
+                    os_error)
+        return False
+    finally:
+        os.close(lock_fd)
+
+    log.debug("Refreshing the cached results in the background")
+    return True
@@ -14,6 +14,8 @@ class Check(object):
         self.status = status
         self.note = note
         self.message = message
+        self.fingerprint = None
+        self.duration = None
 
     def get_name(self):
         """Return the check name"""
@@ -50,6 +52,43 @@ class Check(object):
 
         self.message = message
 
+    def get_fingerprint(self):
+        """Returns the fingerprint of the inputs evaluated by the check"""
+
+        return self.fingerprint
+
+    def set_fingerprint(self, fingerprint):
+        """Set the fingerprint of the inputs evaluated by the check"""
+
+        self.fingerprint = fingerprint
+
+    def get_duration(self):
+        """Returns the time taken by the check in milliseconds"""
+
+        return self.duration
+
+    def set_duration(self, duration):
+        """Set the time taken by the check in milliseconds"""
+
+        self.duration = duration
+
+    def to_dict(self):
+        """Returns the check as a JSON serializable dictionary"""
+
+        data = dict(vars(self))
+        data["type"] = self.__class__.__name__
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates the check from the dictionary returned by to_dict"""
+
+        check = cls.__new__(cls)
+        Check.__init__(check, None)
+        check.__dict__.update((key, val) for key, val in data.items()
+                              if key != "type")
+        return check
+
 
 class ServiceCheck(Check):
     """Manage service check information"""
@@ -190,6 +229,55 @@ class ConfigurationFileCheck(FileCheck):
                                              "current_value": configured_value,
                                              "possible_values": possible_values}
 
+    def to_dict(self):
+        """Returns the check as a JSON serializable dictionary, attributes
+        are stored as a list since they can be tuples"""
+
+        data = FileCheck.to_dict(self)
+        data["config_attributes"] = [[attribute, val] for attribute, val
+                                     in self.config_attributes.items()]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates the check from the dictionary returned by to_dict"""
+
+        check = super(ConfigurationFileCheck, cls).from_dict(data)
+        check.config_attributes = {}
+        for (attribute, val) in data.get("config_attributes", []):
+            if isinstance(attribute, list):
+                attribute = tuple(attribute)
+            check.config_attributes[attribute] = val
+
+        return check
+
+
+class DeviceCheck(Check):
+    """Manage device check information"""
+
+    def __init__(self, name, device, status=None, note=None):
+        Check.__init__(self, name, status, note)
+        self.device = device
+        self.attributes = {}
+
+    def get_device(self):
+        """Returns the device address"""
+
+        return self.device
+
+    def get_attributes(self):
+        """Returns the device attributes"""
+
+        return self.attributes
+
+    def add_attribute(self, attribute, is_correct, value_found,
+                      expected_value):
+        """Add new attribute to device attribute dictionary"""
+
+        self.attributes[attribute] = {"status": is_correct,
+                                      "value_found": value_found,
+                                      "expected_value": expected_value}
+
 
 class ConfigCheck(Check):
     """General system configuration check"""
@@ -208,6 +296,14 @@ class ConfigCheck(Check):
 
         self.configs.append((config, is_present))
 
+    @classmethod
+    def from_dict(cls, data):
+        """Creates the check from the dictionary returned by to_dict"""
+
+        check = super(ConfigCheck, cls).from_dict(data)
+        check.configs = [tuple(config) for config in data.get("configs", [])]
+        return check
+
 
 class Notes(object):
     """Stores common notes used to define the status of the
@@ -217,3 +313,25 @@ class Notes(object):
     FAIL_TO_FIX = "Unable to Fix"
     NOT_FIXABLE = "Not Auto-Fixable"
     FIXED_NEED_REBOOT = "Auto Fixed, Needs Reboot"
+
+
+def get_status_msg(status):
+    """Map the check status with the status keyword"""
+
+    if status is False:
+        return "FAIL"
+    if status is None:
+        return "UNKNOWN"
+
+    return "PASS"
+
+
+def check_from_dict(data):
+    """Creates the check of the type stored in the dictionary returned by
+    Check.to_dict"""
+
+    check_class = globals().get(data.get("type"))
+    if not isinstance(check_class, type) or not issubclass(check_class, Check):
+        check_class = Check
+
+    return check_class.from_dict(data)
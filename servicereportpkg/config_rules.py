@@ -0,0 +1,259 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Declarative rules for configuration file checks. A plugin declares the
+directives expected in a configuration file, the file is scanned once to
+evaluate all of them and the missing directives are appended to repair
+the file."""
+
+
+import os
+import re
+from collections import OrderedDict
+
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.timings import account_file_read
+
+
+class ConfigRule(object):
+    """Base class of the configuration rules. A rule expects a directive
+    to be configured with the expected value, an optional is_valid
+    function accepts values other than the expected one."""
+
+    def __init__(self, attribute, expected_value, is_valid=None):
+        self.attribute = attribute
+        self.expected_value = expected_value
+        self.is_valid = is_valid
+
+    def match(self, line):
+        """Returns the value configured by the line if the line configures
+        the directive of this rule else None"""
+
+        return None
+
+    def is_satisfied(self, value):
+        """Returns True if the configured value satisfies the rule"""
+
+        if self.is_valid is not None and value is not None:
+            return self.is_valid(value)
+
+        return value == self.expected_value
+
+    def get_line(self):
+        """Returns the line that configures the directive with the
+        expected value"""
+
+        return None
+
+
+class LineRule(ConfigRule):
+    """Expects a line, e.g. an udev rule or a module name in modules-load.d.
+    Whitespace differences are ignored."""
+
+    def __init__(self, line):
+        ConfigRule.__init__(self, line, line)
+        self.normalized_line = " ".join(line.split())
+
+    def match(self, line):
+        if " ".join(line.split()) == self.normalized_line:
+            return self.expected_value
+
+        return None
+
+    def get_line(self):
+        return self.expected_value
+
+
+class ModprobeOptionRule(ConfigRule):
+    """Expects a module option in a modprobe.d file, the last options line
+    setting the option wins like in modprobe"""
+
+    def __init__(self, module, option, value):
+        ConfigRule.__init__(self, (module, option), value)
+        self.module = module
+        self.option = option
+        self.pattern = re.compile(r"^options\s+" + re.escape(module) +
+                                  r"\s+(?:.*\s)?" + re.escape(option) +
+                                  r"=(\S+)")
+
+    def match(self, line):
+        match = self.pattern.match(line)
+        if match:
+            return match.group(1)
+
+        return None
+
+    def get_option(self):
+        """Returns the option with the expected value"""
+
+        return "%s=%s" % (self.option, self.expected_value)
+
+    def get_line(self):
+        return "options %s %s" % (self.module, self.get_option())
+
+
+class LimitsRule(ConfigRule):
+    """Expects a pam_limits entry: <domain> <type> <item> <value>. The
+    limit type '-' sets both soft and hard limits."""
+
+    def __init__(self, domain, limit_type, item, value, is_valid=None):
+        ConfigRule.__init__(self, "%s %s %s %s" % (domain, limit_type,
+                                                   item, value), str(value),
+                            is_valid)
+        self.domain = domain
+        self.limit_type = limit_type
+        self.item = item
+
+    def match(self, line):
+        fields = line.split()
+        if len(fields) == 4 and fields[0] == self.domain and \
+                fields[1] == self.limit_type and fields[2] == self.item:
+            return fields[3]
+
+        return None
+
+    def get_line(self):
+        return self.attribute
+
+
+class SysctlRule(ConfigRule):
+    """Expects a kernel parameter in a sysctl.d file: <key> = <value>"""
+
+    def __init__(self, key, value, is_valid=None):
+        ConfigRule.__init__(self, key, str(value), is_valid)
+        self.pattern = re.compile(r"^-?" + re.escape(key) + r"\s*=\s*(\S+)")
+
+    def match(self, line):
+        match = self.pattern.match(line)
+        if match:
+            return match.group(1)
+
+        return None
+
+    def get_line(self):
+        return "%s = %s" % (self.attribute, self.expected_value)
+
+
+class ConfigFile(object):
+    """A configuration file and the rules it must satisfy"""
+
+    def __init__(self, file_path, rules, comment="#"):
+        self.log = get_default_logger()
+        self.file_path = file_path
+        self.rules = rules
+        self.comment = comment
+
+    def get_file_path(self):
+        """Returns the configuration file path"""
+
+        return self.file_path
+
+    def evaluate(self):
+        """Scan the file once and returns a list of (rule, value) tuples,
+        value is the last value configured for the rule directive or None
+        if the directive is not configured. Returns None if the file is
+        not readable."""
+
+        values = dict((rule, None) for rule in self.rules)
+        size = 0
+
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as o_file:
+                for line in o_file:
+                    size += len(line)
+                    line = line.strip()
+                    if not line or line.startswith(self.comment):
+                        continue
+
+                    for rule in self.rules:
+                        value = rule.match(line)
+                        if value is not None:
+                            values[rule] = value
+        except (IOError, OSError) as exception:
+            self.log.debug("Failed to read %s, error: %s",
+                           self.file_path, exception)
+            return None
+
+        account_file_read(size)
+        return [(rule, values[rule]) for rule in self.rules]
+
+    def update_check(self, conf_check):
+        """Evaluate the rules and fill the attributes of the configuration
+        file check. Returns True if all the rules are satisfied."""
+
+        status = True
+        results = self.evaluate()
+
+        if results is None:
+            self.log.error("File not found : %s", self.file_path)
+            results = [(rule, None) for rule in self.rules]
+
+        for (rule, value) in results:
+            is_satisfied = rule.is_satisfied(value)
+            if not is_satisfied:
+                status = False
+
+            conf_check.add_attribute(rule.attribute, is_satisfied, value,
+                                     rule.expected_value)
+
+        conf_check.set_status(status)
+        return status
+
+    def get_missing_lines(self):
+        """Returns the lines to append for the unsatisfied rules, an empty
+        list if the file satisfies all of them"""
+
+        results = self.evaluate()
+        if results is None:
+            results = [(rule, None) for rule in self.rules]
+
+        lines = []
+        module_options = OrderedDict()
+        for (rule, value) in results:
+            if rule.is_satisfied(value):
+                continue
+
+            # Missing options of a module are set with one options line
+            if isinstance(rule, ModprobeOptionRule):
+                module_options.setdefault(rule.module, []).append(
+                    rule.get_option())
+            else:
+                lines.append(rule.get_line())
+
+        for module, options in module_options.items():
+            lines.append("options %s %s" % (module, " ".join(options)))
+
+        return lines
+
+    def fix(self):
+        """Append the lines of the unsatisfied rules to the file. Applying
+        the fix again leaves the file unchanged."""
+
+        lines = self.get_missing_lines()
+        if not lines:
+            return True
+
+        try:
+            file_dir = os.path.dirname(self.file_path)
+            if not os.path.isdir(file_dir):
+                os.makedirs(file_dir)
+
+            prefix = ""
+            if os.path.isfile(self.file_path) and \
+                    os.path.getsize(self.file_path) > 0:
+                with open(self.file_path, "rb") as o_file:
+                    o_file.seek(-1, os.SEEK_END)
+                    if o_file.read(1) != b"\n":
+                        prefix = "\n"
+
+            with open(self.file_path, "a", encoding="utf-8") as o_file:
+                o_file.write(prefix + "\n".join(lines) + "\n")
+        except (IOError, OSError) as exception:
+            self.log.error("Failed to update %s, error: %s",
+                           self.file_path, exception)
+            return False
+
+        self.log.info("Updated %s: %s", self.file_path, ", ".join(lines))
+        return True
@@ -45,3 +45,34 @@ def backup_file(_file):
         return None
 
     return backup_file_path
+
+
+def write_file_atomic(_file, data):
+    """Write the data to a temporary file in the same directory and rename
+    it over the given file, readers never see a partially written file.
+    Missing parent directories are created.
+
+    Returns:
+    True on success else False"""
+
+    log = get_default_logger()
+    temp_file = _file + ".tmp." + str(os.getpid())
+
+    try:
+        file_dir = os.path.dirname(_file)
+        if file_dir:
+            os.makedirs(file_dir, exist_ok=True)
+
+        with open(temp_file, "w", encoding="utf-8") as o_file:
+            o_file.write(data)
+
+        os.rename(temp_file, _file)
+    except (IOError, OSError) as exception:
+        log.debug("Failed to write %s, error: %s", _file, exception)
+
+        if os.path.isfile(temp_file):
+            os.remove(temp_file)
+
+        return False
+
+    return True
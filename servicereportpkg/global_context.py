@@ -6,6 +6,12 @@
 
 import os
 import sys
+import uuid
 
 TOOL_NAME = os.path.basename(sys.argv[0])
 SUPPORTED_ARCHS = ["ppc64le"]
+STATE_DIR = "/var/lib/servicereport"
+# Runtime files, cleared on every boot
+RUN_DIR = "/run/servicereport"
+# Identifies the records of a run in the journal
+RUN_ID = uuid.uuid4().hex
@@ -0,0 +1,352 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Append-only history of the run results kept in a SQLite database,
+along with the queries to find the checks that changed between runs"""
+
+
+import os
+import re
+import json
+import time
+import sqlite3
+from argparse import ArgumentParser
+
+from servicereportpkg.check import get_status_msg
+from servicereportpkg.global_context import STATE_DIR, RUN_ID
+from servicereportpkg.logger import get_default_logger
+
+
+HISTORY_DB = STATE_DIR + "/history.db"
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    tool_version TEXT,
+    repair INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE TABLE IF NOT EXISTS checks (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    plugin TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    note TEXT,
+    expected TEXT,
+    found TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS checks_run ON checks (run_id, plugin, check_name);
+CREATE INDEX IF NOT EXISTS checks_plugin ON checks (plugin, check_name);
+"""
+
+# Runs older than HISTORY_MAX_AGE seconds are pruned, along with the
+# runs beyond the HISTORY_MAX_RUNS latest ones
+HISTORY_MAX_AGE = 90 * 24 * 60 * 60
+HISTORY_MAX_RUNS = 5000
+
+# Runs pruned by prune_runs, the parameters are the oldest start time
+# kept and the number of runs kept
+PRUNED_RUNS = """
+SELECT run_id FROM runs WHERE started < ? OR run_id NOT IN
+    (SELECT run_id FROM runs ORDER BY started DESC LIMIT ?)
+"""
+
+# Units accepted by the --since option of history command
+TIME_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def get_check_values(check):
+    """Returns the expected and the found values of the check as JSON
+    strings, None if the check type does not record them"""
+
+    data = check.to_dict()
+    expected = None
+    found = None
+
+    if "expected_value" in data or "value_found" in data:
+        expected = data.get("expected_value")
+        found = data.get("value_found")
+    elif "config_attributes" in data:
+        expected = dict((str(attr), val["possible_values"])
+                        for attr, val in data["config_attributes"])
+        found = dict((str(attr), val["current_value"])
+                     for attr, val in data["config_attributes"])
+    elif "attributes" in data:
+        expected = dict((attr, val["expected_value"])
+                        for attr, val in data["attributes"].items())
+        found = dict((attr, val["value_found"])
+                     for attr, val in data["attributes"].items())
+    elif "enabled" in data:
+        found = {"enabled": data["enabled"], "active": data["active"]}
+
+    if expected is not None:
+        expected = json.dumps(expected)
+    if found is not None:
+        found = json.dumps(found)
+
+    return (expected, found)
+
+
+class History(object):
+    """SQLite store of the results of every run"""
+
+    def __init__(self, db_file=HISTORY_DB, max_age=HISTORY_MAX_AGE,
+                 max_runs=HISTORY_MAX_RUNS):
+        self.log = get_default_logger()
+        self.db_file = db_file
+        self.max_age = max_age
+        self.max_runs = max_runs
+        self.conn = None
+
+    def open(self, create=True):
+        """Open the database, creates it if create is True. Returns False
+        if the database is not available."""
+
+        if not create and not os.path.isfile(self.db_file):
+            return False
+
+        try:
+            if create:
+                os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            self.conn = sqlite3.connect(self.db_file, timeout=30)
+            self.conn.executescript(HISTORY_SCHEMA)
+        except (OSError, sqlite3.Error) as exception:
+            self.log.debug("Unable to open the history database %s, "
+                           "error: %s", self.db_file, exception)
+            self.conn = None
+            return False
+
+        return True
+
+    def close(self):
+        """Close the database"""
+
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def prune_runs(self):
+        """Delete the runs older than the maximum age and the runs beyond
+        the maximum number of runs, must be called in a transaction"""
+
+        params = (time.time() - self.max_age, self.max_runs)
+        self.conn.execute("DELETE FROM checks WHERE run_id IN (%s)"
+                          % PRUNED_RUNS, params)
+        self.conn.execute("DELETE FROM runs WHERE run_id IN (%s)"
+                          % PRUNED_RUNS, params)
+
+    def record_run(self, validation_results, tool_version, repair,
+                   status):
+        """Append the results of this run, the old runs are pruned in the
+        same transaction"""
+
+        rows = []
+        for plugin in validation_results:
+            for plugin_obj in validation_results[plugin]:
+                for check in plugin_obj.checks:
+                    (expected, found) = get_check_values(check)
+                    rows.append((RUN_ID, plugin, check.get_name(),
+                                 get_status_msg(check.get_status()),
+                                 check.get_note(), expected, found,
+                                 check.get_duration()))
+
+        try:
+            with self.conn:
+                self.conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                                  (RUN_ID, time.time(), tool_version,
+                                   int(bool(repair)), get_status_msg(status)))
+                self.conn.executemany("INSERT INTO checks VALUES "
+                                      "(?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self.prune_runs()
+        except sqlite3.Error as sqlite_error:
+            self.log.warning("Failed to record the run in %s, error: %s",
+                             self.db_file, sqlite_error)
+            return False
+
+        return True
+
+    def get_runs(self, limit=None):
+        """Returns the latest runs, newest first"""
+
+        query = "SELECT run_id, started, tool_version, repair, status " \
+                "FROM runs ORDER BY started DESC"
+        if limit is not None:
+            return self.conn.execute(query + " LIMIT ?", (limit,)).fetchall()
+
+        return self.conn.execute(query).fetchall()
+
+    def get_last_run(self, before=None):
+        """Returns the id of the latest run started before the given time,
+        None if there is no such run"""
+
+        if before is None:
+            before = float("inf")
+
+        row = self.conn.execute("SELECT run_id FROM runs WHERE started <= ? "
+                                "ORDER BY started DESC LIMIT 1",
+                                (before,)).fetchone()
+
+        return row[0] if row else None
+
+    def get_changes(self, base_run, run):
+        """Returns the (plugin, check, old status, new status, note) of the
+        checks whose status changed from base_run to run. Checks missing in
+        base_run are reported with old status None."""
+
+        return self.conn.execute(
+            "SELECT c.plugin, c.check_name, b.status, c.status, c.note "
+            "FROM checks c LEFT JOIN checks b ON b.run_id = ? AND "
+            "b.plugin = c.plugin AND b.check_name = c.check_name "
+            "WHERE c.run_id = ? AND (b.status IS NULL OR b.status != c.status) "
+            "ORDER BY c.plugin, c.check_name", (base_run, run)).fetchall()
+
+    def get_check_history(self, plugin, check_name, limit=None):
+        """Returns the (started, status, note, expected, found) of the check
+        in the latest runs, newest first"""
+
+        query = "SELECT r.started, c.status, c.note, c.expected, c.found " \
+                "FROM checks c JOIN runs r ON r.run_id = c.run_id " \
+                "WHERE c.plugin = ? AND c.check_name = ? " \
+                "ORDER BY r.started DESC"
+        args = (plugin, check_name)
+        if limit is not None:
+            query += " LIMIT ?"
+            args += (limit,)
+
+        return self.conn.execute(query, args).fetchall()
+
+
+def record_history(validation_results, tool_version, repair, status,
+                   changes_since_last=False):
+    """Append the results of this run to the history. If
+    changes_since_last, returns the changes since the previous run, None
+    if no previous run is recorded."""
+
+    history = History()
+    if not history.open():
+        return None
+
+    try:
+        previous_run = history.get_last_run()
+        history.record_run(validation_results, tool_version, repair, status)
+        if changes_since_last and previous_run is not None:
+            return history.get_changes(previous_run, RUN_ID)
+    finally:
+        history.close()
+
+    return None
+
+
+def format_time(timestamp):
+    """Returns the time stamp in the local time"""
+
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def print_changes(changes):
+    """Prints the checks whose status changed, regressions are marked"""
+
+    if not changes:
+        print("No check changed its status")
+        return
+
+    print("   {0:20}{1:50}{2}".format("Plugin", "Check", "Status"))
+    for (plugin, check_name, old_status, new_status, note) in changes:
+        marker = "!" if new_status == "FAIL" else " "
+        change = "%s -> %s" % (old_status or "NEW", new_status)
+        if note is not None:
+            change += " (%s)" % note
+        print(" {0} {1:20}{2:50}{3}".format(marker, plugin, check_name,
+                                             change))
+
+
+def parse_interval(interval):
+    """Returns the number of seconds of an interval like 30m, 24h or 7d"""
+
+    match = re.match(r"^(\d+)([smhd]?)$", interval)
+    if not match:
+        raise ValueError("invalid interval %s" % interval)
+
+    return int(match.group(1)) * TIME_UNITS[match.group(2) or "s"]
+
+
+def parse_history_args(args):
+    """Command line argument parser of the history command"""
+
+    parser = ArgumentParser(prog="servicereport history",
+                            description="Query the results of the "
+                                        "previous runs")
+
+    parser.add_argument("--since", dest="since", default=None,
+                        metavar="INTERVAL",
+                        help="list the checks whose status changed since "
+                             "the last run before INTERVAL ago, e.g. 24h")
+
+    parser.add_argument("--check", dest="check", nargs=2, default=None,
+                        metavar=("PLUGIN", "CHECK"),
+                        help="list the results of the check in the latest "
+                             "runs")
+
+    parser.add_argument("-n", "--limit", dest="limit", type=int, default=10,
+                        help="number of runs to list, default %(default)s")
+
+    parsed_argument = parser.parse_args(args)
+
+    if parsed_argument.since is not None:
+        try:
+            parsed_argument.since = parse_interval(parsed_argument.since)
+        except ValueError as value_error:
+            parser.error(str(value_error))
+
+    return parsed_argument
+
+
+def history_main(args):
+    """Entry point of the history command"""
+
+    cmd_opts = parse_history_args(args)
+
+    history = History()
+    if not history.open(create=False):
+        print("No run history found in %s" % history.db_file)
+        return 1
+
+    try:
+        if cmd_opts.since is not None:
+            last_run = history.get_last_run()
+            base_run = history.get_last_run(time.time() - cmd_opts.since)
+            if last_run is None or base_run is None:
+                print("No run found before the given interval")
+                return 1
+
+            changes = history.get_changes(base_run, last_run)
+            print_changes(changes)
+            return 1 if any(change[3] == "FAIL" for change in changes) else 0
+
+        if cmd_opts.check is not None:
+            for (started, status, note, expected, found) in \
+                    history.get_check_history(cmd_opts.check[0],
+                                              cmd_opts.check[1],
+                                              cmd_opts.limit):
+                print("{0:22}{1:10}{2:26}expected: {3} found: {4}".format(
+                    format_time(started), status, note or "", expected,
+                    found))
+            return 0
+
+        print("   {0:22}{1:34}{2:10}{3:8}{4}".format("Started", "Run ID",
+                                                   "Version", "Repair",
+                                                   "Status"))
+        for (run_id, started, tool_version, repair, status) in \
+                history.get_runs(cmd_opts.limit):
+            print("   {0:22}{1:34}{2:10}{3:8}{4}".format(
+                format_time(started), run_id, tool_version or "",
+                "yes" if repair else "no", status))
+    finally:
+        history.close()
+
+    return 0
@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Suppress the log messages the checks repeat in every run. Periodic
+runs log a finding again only when it changes or once per interval."""
+
+
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from servicereportpkg.global_context import STATE_DIR
+from servicereportpkg.utils import get_file_content
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.file_manager import write_file_atomic
+
+
+LOG_DEDUP_STATE = STATE_DIR + "/log-dedup.json"
+LOG_DEDUP_VERSION = 1
+# Repeated messages are logged again once a day by default
+LOG_DEDUP_INTERVAL = 24 * 60 * 60
+
+
+def get_record_fingerprint(record):
+    """Returns the fingerprint of the level and the message of the
+    record"""
+
+    message = "%d:%s" % (record.levelno, record.getMessage())
+    return hashlib.sha1(message.encode("utf-8")).hexdigest()
+
+
+class LogDedupFilter(logging.Filter):
+    """Drops the records a check logged in the previous run within the
+    last interval seconds. The state file keeps the fingerprints of the
+    messages each check logged in its last run along with the time they
+    were last logged, so a message logged again after a status change of
+    the check is never suppressed. Records logged outside the checks are
+    never suppressed."""
+
+    def __init__(self, interval=LOG_DEDUP_INTERVAL,
+                 state_file=LOG_DEDUP_STATE):
+        logging.Filter.__init__(self)
+        self.interval = interval
+        self.state_file = state_file
+        self.lock = threading.Lock()
+        self.previous = self.load()
+        self.current = {}
+        self.suppressed = 0
+        self.suppressed_checks = set()
+
+    def load(self):
+        """Returns the message fingerprints of the checks stored by the
+        previous run"""
+
+        data = get_file_content(self.state_file)
+        if data is None:
+            return {}
+
+        try:
+            state = json.loads(data)
+        except ValueError:
+            return {}
+
+        if not isinstance(state, dict) or \
+                state.get("version") != LOG_DEDUP_VERSION:
+            return {}
+
+        return state.get("checks", {})
+
+    def filter(self, record):
+        fields = getattr(record, "sr_fields", {})
+        if fields.get("check") is None:
+            return True
+
+        key = "%s/%s" % (fields.get("plugin"), fields["check"])
+        fingerprint = get_record_fingerprint(record)
+        now = time.time()
+
+        with self.lock:
+            messages = self.current.setdefault(key, {})
+            last_logged = self.previous.get(key, {}).get(fingerprint)
+
+            if last_logged is not None and now - last_logged < self.interval:
+                messages[fingerprint] = last_logged
+                self.suppressed += 1
+                self.suppressed_checks.add(key)
+                return False
+
+            messages[fingerprint] = now
+
+        return True
+
+    def complete(self):
+        """Log the number of suppressed messages and save the fingerprints
+        of the checks executed in this run"""
+
+        log = get_default_logger()
+
+        with self.lock:
+            if self.suppressed:
+                log.info("Suppressed %d repeated log messages of %d checks, "
+                         "logged again after %d seconds", self.suppressed,
+                         len(self.suppressed_checks), self.interval)
+
+            # Checks not executed in this run are kept until their
+            # messages would be logged again anyway
+            now = time.time()
+            checks = dict((key, messages)
+                          for key, messages in self.previous.items()
+                          if messages and
+                          now - max(messages.values()) < self.interval)
+            checks.update(self.current)
+            state = {"version": LOG_DEDUP_VERSION,
+                     "checks": checks}
+
+            if not write_file_atomic(self.state_file, json.dumps(state)):
+                log.warning("Failed to save the log dedup state %s",
+                            self.state_file)
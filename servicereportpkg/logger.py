@@ -3,36 +3,231 @@
 # (C) Copyright IBM Corp. 2018, 2019
 # Author: Sourabh Jain <sourabhjain@linux.ibm.com>
 
-"""Setup the logging functionality with either journal or file handler"""
+"""Setup the logging functionality with either journal, syslog or file
+handler"""
 
 
 import os
+import errno
+import fcntl
+import queue
+import array
+import atexit
+import socket
+import struct
 import logging
+import contextvars
+from contextlib import contextmanager
 from logging import handlers
 
-from servicereportpkg.global_context import TOOL_NAME
+from servicereportpkg.global_context import TOOL_NAME, RUN_ID
 
 
-def get_syslog_formatter(ident):
+# Identifier of the component logging in the current context, every
+# thread and context copy keeps its own identifier
+log_ident = contextvars.ContextVar("log_ident", default=TOOL_NAME)
+
+# Structured fields of the current context, sent as SR_<FIELD> journal
+# fields, e.g. the plugin and the check being executed
+log_fields = contextvars.ContextVar("log_fields", default={})
+
+# Maximum number of log records waiting to be delivered
+LOG_QUEUE_SIZE = 1024
+
+JOURNAL_SOCKET = "/run/systemd/journal/socket"
+
+_log_listener = None
+
+
+class LogIdentFilter(logging.Filter):
+    """Adds the log identifier and the structured fields of the current
+    context to the records. Fields passed with extra={"sr_fields": {}}
+    take precedence over the context fields."""
+
+    def filter(self, record):
+        record.ident = log_ident.get()
+        fields = dict(log_fields.get())
+        fields.update(getattr(record, "sr_fields", {}))
+        record.sr_fields = fields
+        return True
+
+
+@contextmanager
+def log_context(**fields):
+    """Add the given structured fields to the records logged within the
+    context"""
+
+    context_fields = dict(log_fields.get())
+    context_fields.update(fields)
+    token = log_fields.set(context_fields)
+    try:
+        yield
+    finally:
+        log_fields.reset(token)
+
+
+@contextmanager
+def log_identifier(ident, **fields):
+    """Log with the given identifier and structured fields within the
+    context"""
+
+    token = log_ident.set(ident)
+    try:
+        with log_context(**fields):
+            yield
+    finally:
+        log_ident.reset(token)
+
+
+def get_journal_priority(levelno):
+    """Maps the log level to the syslog priority of the journal"""
+
+    if levelno >= logging.CRITICAL:
+        return 2
+    if levelno >= logging.ERROR:
+        return 3
+    if levelno >= logging.WARNING:
+        return 4
+    # Recommendations are logged as notice
+    if levelno > logging.INFO:
+        return 5
+    if levelno >= logging.INFO:
+        return 6
+
+    return 7
+
+
+def get_journal_field(name, value):
+    """Returns the field serialized in the journal native protocol"""
+
+    name = name.encode("utf-8")
+    value = str(value).encode("utf-8")
+
+    if b"\n" not in value:
+        return name + b"=" + value + b"\n"
+
+    # Binary safe serialization for the multi line values
+    return name + b"\n" + struct.pack("<Q", len(value)) + value + b"\n"
+
+
+class JournalHandler(logging.Handler):
+    """Sends the records to journald with the native protocol, along with
+    the structured SR_* fields of the record"""
+
+    def __init__(self, socket_path=JOURNAL_SOCKET):
+        logging.Handler.__init__(self)
+        self.socket_path = socket_path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.connect(socket_path)
+
+    def get_fields(self, record):
+        """Returns the journal fields of the record"""
+
+        fields = [("MESSAGE", self.format(record)),
+                  ("PRIORITY", get_journal_priority(record.levelno)),
+                  ("SYSLOG_IDENTIFIER", getattr(record, "ident", TOOL_NAME)),
+                  ("CODE_FILE", record.pathname),
+                  ("CODE_LINE", record.lineno),
+                  ("CODE_FUNC", record.funcName),
+                  ("SR_RUN_ID", RUN_ID)]
+
+        for (name, value) in getattr(record, "sr_fields", {}).items():
+            if value is not None:
+                fields.append(("SR_" + name.upper(), value))
+
+        return fields
+
+    def send(self, data):
+        """Send the serialized record, a record larger than the socket
+        buffer is passed to journald in a sealed memfd"""
+
+        try:
+            self.sock.send(data)
+            return
+        except OSError as os_error:
+            if os_error.errno not in (errno.EMSGSIZE, errno.ENOBUFS):
+                raise
+
+        memfd = os.memfd_create("servicereport-journal", os.MFD_ALLOW_SEALING)
+        try:
+            os.write(memfd, data)
+            fcntl.fcntl(memfd, fcntl.F_ADD_SEALS,
+                        fcntl.F_SEAL_SHRINK | fcntl.F_SEAL_GROW |
+                        fcntl.F_SEAL_WRITE | fcntl.F_SEAL_SEAL)
+            self.sock.sendmsg([], [(socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                                    array.array("i", [memfd]))])
+        finally:
+            os.close(memfd)
+
+    def emit(self, record):
+        try:
+            self.send(b"".join(get_journal_field(name, value)
+                               for (name, value) in self.get_fields(record)))
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.sock.close()
+        logging.Handler.close(self)
+
+
+class BoundedQueueHandler(handlers.QueueHandler):
+    """Queues the records without blocking the logging thread, the
+    records that do not fit in the queue are dropped and counted"""
+
+    def __init__(self, log_queue):
+        handlers.QueueHandler.__init__(self, log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogQueueListener(handlers.QueueListener):
+    """Delivers the queued records to the log handler on a background
+    thread"""
+
+    def enqueue_sentinel(self):
+        # The queue may be full, wait for the listener to make room
+        self.queue.put(self._sentinel)
+
+
+def get_syslog_formatter():
     """Returns log format for syslog handler"""
 
-    return logging.Formatter(ident+': %(levelname)s - %(message)s')
+    return logging.Formatter('%(ident)s: %(levelname)s - %(message)s')
 
 
-def get_file_formatter(ident):
+def get_file_formatter():
     """Returns log format for file log handler"""
 
-    _format = '%(asctime)s '+ ident + '['+str(os.getpid())+']: %(levelname)s - %(message)s'
+    _format = '%(asctime)s %(ident)s[%(process)d]: %(levelname)s - %(message)s'
     return logging.Formatter(_format,
                              "%b %d %H:%M:%S")
 
 
+def configure_journal_handler():
+    """Configure the journal native protocol handler and returns an
+    instance of JournalHandler, None if journald is not running"""
+
+    try:
+        log_handler = JournalHandler()
+        log_handler.setFormatter(logging.Formatter('%(message)s'))
+    except OSError:
+        return None
+
+    return log_handler
+
+
 def configure_syslog_handler():
     """Configure the syslog and returns an instance of SysLogHandler"""
 
     try:
         log_handler = logging.handlers.SysLogHandler(address="/dev/log")
-        log_handler.setFormatter(get_syslog_formatter(TOOL_NAME))
+        log_handler.setFormatter(get_syslog_formatter())
     except Exception:
         print("Failed to configure syslog")
         return None
@@ -46,7 +241,7 @@ def configure_filelog_handler(custom_log_file):
 
     try:
         log_handler = logging.FileHandler(custom_log_file)
-        log_handler.setFormatter(get_file_formatter(TOOL_NAME))
+        log_handler.setFormatter(get_file_formatter())
     except IOError:
         print("Failed to access the log file: %s", custom_log_file)
         return None
@@ -65,7 +260,11 @@ def add_log_level(logger, level_name, num_val):
 
 
 def setup_logger(custom_log_file=None, enable_debug=0):
-    """Setup the logger with either journal or file handler"""
+    """Setup the logger with either journal or file handler. The records
+    are delivered to the handler through a bounded queue, so a slow
+    journal never blocks the plugins."""
+
+    global _log_listener
 
     logger = logging.getLogger(TOOL_NAME)
     add_log_level(logger, '    RECOMMENDATION', 25)
@@ -80,29 +279,62 @@ def setup_logger(custom_log_file=None, enable_debug=0):
     if custom_log_file:
         log_handler = configure_filelog_handler(custom_log_file)
     else:
-        log_handler = configure_syslog_handler()
+        log_handler = configure_journal_handler()
+        if log_handler is None:
+            log_handler = configure_syslog_handler()
 
     if log_handler:
-        logger.addHandler(log_handler)
+        queue_handler = BoundedQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        # The identifier is set by the logging thread's context
+        queue_handler.addFilter(LogIdentFilter())
+        logger.addHandler(queue_handler)
+
+        _log_listener = LogQueueListener(queue_handler.queue, log_handler)
+        _log_listener.start()
+        atexit.register(shutdown_logger)
     else:
         logger.addHandler(logging.NullHandler())
 
     return logger
 
 
-def change_log_identifier(ident, logger, log_handler_name=None):
-    """Change the log identifier for a given log handler. If log handler name
-    is not specified function will update the log identifier of all available
-    handlers in the logger."""
+def add_log_filter(log_filter):
+    """Add the filter to the handlers of the logger, the filter runs in
+    the logging thread after the context fields are added to the record"""
 
+    logger = logging.getLogger(TOOL_NAME)
     for log_handler in logger.handlers:
-        log_handler_class = log_handler.__class__.__name__
+        log_handler.addFilter(log_filter)
 
-        if not log_handler_name or log_handler_name == log_handler_class:
-            if log_handler_class == "SysLogHandler":
-                log_handler.setFormatter(get_syslog_formatter(ident))
-            elif log_handler_class == "FileHandler":
-                log_handler.setFormatter(get_file_formatter(ident))
+
+def shutdown_logger():
+    """Deliver the queued records and stop the log listener, records
+    logged afterwards are delivered synchronously. Must be called before
+    the system goes down, e.g. before crashing the kernel."""
+
+    global _log_listener
+
+    if _log_listener is None:
+        return
+
+    log_listener = _log_listener
+    _log_listener = None
+    log_listener.stop()
+
+    logger = logging.getLogger(TOOL_NAME)
+    for log_handler in list(logger.handlers):
+        if not isinstance(log_handler, BoundedQueueHandler):
+            continue
+
+        logger.removeHandler(log_handler)
+        for target in log_listener.handlers:
+            for log_filter in log_handler.filters:
+                target.addFilter(log_filter)
+            logger.addHandler(target)
+
+        if log_handler.dropped:
+            logger.warning("%d log messages dropped, the log queue was full",
+                           log_handler.dropped)
 
 
 def get_default_logger():
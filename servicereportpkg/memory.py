@@ -0,0 +1,185 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Memory used by the plugin discovery and by each plugin, measured with
+tracemalloc and the resident set size of the process"""
+
+
+import os
+import re
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+STATM_FILE = "/proc/self/statm"
+
+# Number of frames stored per allocation by tracemalloc
+TRACEMALLOC_FRAMES = 1
+
+_memory_accounting = False
+_memory_snapshots = False
+_usages = []
+_usages_lock = threading.Lock()
+
+
+class MemoryUsage(object):
+    """Memory used while executing a plugin or a phase of the run"""
+
+    def __init__(self, name):
+        self.name = name
+        self.python_peak = 0
+        self.python_retained = 0
+        self.rss_delta = 0
+        self.top_site = None
+        self.top_site_size = 0
+
+    def get_peak(self):
+        """Returns the peak memory used in bytes, the larger of the Python
+        allocations and the growth of the resident set, which includes
+        the allocations of the C libraries"""
+
+        return max(self.python_peak, self.rss_delta)
+
+    def to_dict(self):
+        """Returns the memory usage as a JSON serializable dictionary"""
+
+        return {"name": self.name,
+                "python_peak_bytes": self.python_peak,
+                "python_retained_bytes": self.python_retained,
+                "rss_delta_bytes": self.rss_delta,
+                "top_site": self.top_site,
+                "top_site_bytes": self.top_site_size}
+
+
+def enable_memory_accounting(snapshots=False):
+    """Trace the Python allocations from now on. With snapshots, the
+    source line that retained most memory is recorded as well."""
+
+    global _memory_accounting, _memory_snapshots
+
+    _memory_accounting = True
+    _memory_snapshots = snapshots
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+
+def is_memory_accounting_enabled():
+    """Returns True if the memory usage is accounted"""
+
+    return _memory_accounting
+
+
+def get_rss():
+    """Returns the resident set size of the process in bytes, None if it
+    is not known"""
+
+    try:
+        with open(STATM_FILE, "r") as o_file:
+            return int(o_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+
+def take_snapshot():
+    """Returns a snapshot of the traced allocations, leaving out the
+    allocations of tracemalloc itself"""
+
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def get_top_site(snapshot, base_snapshot):
+    """Returns the source line that allocated the most memory since the
+    base snapshot along with the size"""
+
+    for stat in snapshot.compare_to(base_snapshot, "lineno"):
+        if stat.size_diff <= 0:
+            break
+
+        frame = stat.traceback[0]
+        return ("%s:%d" % (frame.filename, frame.lineno), stat.size_diff)
+
+    return (None, 0)
+
+
+@contextmanager
+def accounted(name):
+    """Account the memory used within the context. The Python allocations
+    are process wide, so the contexts must not run concurrently. Yields
+    the MemoryUsage, None if the memory is not accounted."""
+
+    if not _memory_accounting:
+        yield None
+        return
+
+    usage = MemoryUsage(name)
+    base_snapshot = None
+    if _memory_snapshots:
+        base_snapshot = take_snapshot()
+
+    tracemalloc.reset_peak()
+    (base_traced, _) = tracemalloc.get_traced_memory()
+    base_rss = get_rss()
+    try:
+        yield usage
+    finally:
+        (traced, peak) = tracemalloc.get_traced_memory()
+        usage.python_peak = peak - base_traced
+        usage.python_retained = traced - base_traced
+
+        rss = get_rss()
+        if rss is not None and base_rss is not None:
+            usage.rss_delta = max(rss - base_rss, 0)
+
+        if base_snapshot is not None:
+            (usage.top_site, usage.top_site_size) = \
+                get_top_site(take_snapshot(), base_snapshot)
+
+        with _usages_lock:
+            _usages.append(usage)
+
+
+def get_memory_usages():
+    """Returns the memory usages accounted so far"""
+
+    with _usages_lock:
+        return list(_usages)
+
+
+def parse_memory_budget(value):
+    """Returns the (plugin, bytes) of a memory budget given as MB or
+    PLUGIN=MB, plugin is None for the budget of every plugin"""
+
+    match = re.match(r"^(?:([\w-]+)=)?(\d+(?:\.\d+)?)$", value)
+    if not match:
+        raise ValueError("invalid memory budget %s" % value)
+
+    plugin = match.group(1).lower() if match.group(1) else None
+    return (plugin, int(float(match.group(2)) * 1024 * 1024))
+
+
+def format_size(size):
+    """Returns the size in bytes formatted in KB"""
+
+    return "%.1f" % (size / 1024)
+
+
+def print_memory_usage():
+    """Prints the memory used by each plugin and phase"""
+
+    row = "{0:22}{1:>14}{2:>14}{3:>14}  {4}"
+
+    print("\nMemory (KB):\n")
+    print(row.format("Name", "Python peak", "Retained", "RSS growth",
+                     "Top allocation"))
+    for usage in get_memory_usages():
+        top_site = ""
+        if usage.top_site is not None:
+            top_site = "%s (%s)" % (usage.top_site,
+                                    format_size(usage.top_site_size))
+        print(row.format(usage.name, format_size(usage.python_peak),
+                         format_size(usage.python_retained),
+                         format_size(usage.rss_delta), top_site))
@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Profile the phases of the run and the plugins with cProfile, every
+phase and plugin is written to a separate pstats file"""
+
+
+import os
+import re
+import sys
+import pstats
+import cProfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from servicereportpkg.logger import get_default_logger
+
+
+# Number of functions listed in the profile summary by default
+PROFILE_TOP = 20
+
+_profile_dir = None
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def enable_profiling(profile_dir):
+    """Profile the run, the pstats files are written to profile_dir"""
+
+    global _profile_dir
+
+    _profile_dir = profile_dir
+
+
+def is_profiling_enabled():
+    """Returns True if the run is profiled"""
+
+    return _profile_dir is not None
+
+
+def get_profile_name(phase, name=None):
+    """Returns the pstats file name of the phase and the plugin"""
+
+    if name is None:
+        return phase + ".pstats"
+
+    return "%s-%s.pstats" % (phase, re.sub(r"[^\w.-]", "_", name))
+
+
+@contextmanager
+def profiled(phase, name=None):
+    """Profile the code executed within the context. Contexts of the same
+    phase and name add up to one profile. A profiler sees only the calling
+    thread and must not be nested in another profiled context."""
+
+    if _profile_dir is None:
+        yield
+        return
+
+    profile_name = get_profile_name(phase, name)
+    with _profiles_lock:
+        if profile_name not in _profiles:
+            _profiles[profile_name] = cProfile.Profile()
+        profiler = _profiles[profile_name]
+
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+
+def write_profiles():
+    """Write the pstats file of every profile. Returns False if a file
+    could not be written."""
+
+    log = get_default_logger()
+    status = True
+
+    try:
+        os.makedirs(_profile_dir, exist_ok=True)
+    except OSError as os_error:
+        log.warning("Failed to create the profile directory %s, error: %s",
+                    _profile_dir, os_error)
+        return False
+
+    for profile_name, profiler in _profiles.items():
+        profile_file = os.path.join(_profile_dir, profile_name)
+        try:
+            profiler.dump_stats(profile_file)
+            log.debug("Profile written to %s", profile_file)
+        except (IOError, OSError) as exception:
+            log.warning("Failed to write the profile %s, error: %s",
+                        profile_file, exception)
+            status = False
+
+    return status
+
+
+def print_profile_summary(top=PROFILE_TOP):
+    """Prints the functions with the highest cumulative time across all
+    the profiles"""
+
+    if not _profiles:
+        return
+
+    print("\nProfiles written to %s: %s" % (_profile_dir,
+                                             ", ".join(_profiles.keys())))
+    print("Top %d functions by cumulative time:" % top)
+
+    stats = None
+    for profiler in _profiles.values():
+        if stats is None:
+            stats = pstats.Stats(profiler, stream=sys.stdout)
+        else:
+            stats.add(profiler)
+
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
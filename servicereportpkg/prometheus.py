@@ -0,0 +1,154 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Export the results of the run in the Prometheus text format, for the
+textfile collector of the node exporter"""
+
+
+import os
+import time
+
+from servicereportpkg.utils import get_subprocess_count
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.file_manager import write_file_atomic
+
+
+PROMETHEUS_TEXTFILE = "servicereport.prom"
+METRIC_PREFIX = "servicereport_"
+
+# Upper bounds in seconds of the plugin duration histogram buckets
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+
+# Value of the check status gauge
+CHECK_STATUS_VALUES = {True: 1, False: 0, None: -1}
+
+
+def escape_label_value(value):
+    """Returns the label value escaped as per the text format"""
+
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n") \
+        .replace('"', '\\"')
+
+
+def format_labels(labels):
+    """Returns the labels formatted as {name="value",...}"""
+
+    if not labels:
+        return ""
+
+    return "{" + ",".join('%s="%s"' % (name, escape_label_value(value))
+                          for (name, value) in labels) + "}"
+
+
+def format_value(value):
+    """Returns the sample value in the text format"""
+
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float):
+        return repr(value)
+
+    return str(value)
+
+
+class MetricFamily(object):
+    """Samples of a metric along with its help and type"""
+
+    def __init__(self, name, metric_type, help_text):
+        self.name = METRIC_PREFIX + name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.samples = []
+
+    def add_sample(self, value, labels=(), suffix=""):
+        """Add a sample of the metric"""
+
+        self.samples.append((suffix, labels, value))
+
+    def add_histogram(self, values, labels=(), buckets=DURATION_BUCKETS):
+        """Add the bucket, sum and count samples of the observed values"""
+
+        for bound in buckets:
+            self.add_sample(len([value for value in values if value <= bound]),
+                            labels + (("le", bound),), "_bucket")
+        self.add_sample(len(values), labels + (("le", "+Inf"),), "_bucket")
+        self.add_sample(sum(values), labels, "_sum")
+        self.add_sample(len(values), labels, "_count")
+
+    def format(self):
+        """Returns the metric family in the text format"""
+
+        lines = ["# HELP %s %s" % (self.name, self.help_text),
+                 "# TYPE %s %s" % (self.name, self.metric_type)]
+        for (suffix, labels, value) in self.samples:
+            lines.append("%s%s%s %s" % (self.name, suffix,
+                                        format_labels(labels),
+                                        format_value(value)))
+
+        return "\n".join(lines) + "\n"
+
+
+def get_metric_families(validation_results, plugin_durations):
+    """Returns the metric families of the run"""
+
+    check_status = MetricFamily("check_status", "gauge",
+                                "Status of the check, 1 pass, 0 fail and "
+                                "-1 unknown")
+    plugin_duration = MetricFamily("plugin_duration_seconds", "histogram",
+                                   "Time taken by the checks of the plugin")
+    families = [check_status, plugin_duration]
+    plugin_metrics = {}
+
+    for plugin in validation_results:
+        for plugin_obj in validation_results[plugin]:
+            for check in plugin_obj.checks:
+                check_status.add_sample(
+                    CHECK_STATUS_VALUES.get(check.get_status(), -1),
+                    (("plugin", plugin), ("check", check.get_name())))
+
+            for (name, help_text, value) in plugin_obj.get_metrics():
+                if name not in plugin_metrics:
+                    plugin_metrics[name] = MetricFamily(name, "gauge",
+                                                        help_text)
+                    families.append(plugin_metrics[name])
+                plugin_metrics[name].add_sample(value, (("plugin", plugin),))
+
+        if plugin in plugin_durations:
+            plugin_duration.add_histogram([plugin_durations[plugin] / 1000],
+                                          (("plugin", plugin),))
+
+    subprocesses = MetricFamily("run_subprocesses", "gauge",
+                                "Number of processes spawned by the run")
+    subprocesses.add_sample(get_subprocess_count())
+    families.append(subprocesses)
+
+    last_run = MetricFamily("last_run_timestamp_seconds", "gauge",
+                            "Time the last run completed")
+    last_run.add_sample(time.time())
+    families.append(last_run)
+
+    return families
+
+
+def write_prometheus_textfile(textfile_dir, validation_results,
+                              plugin_durations):
+    """Atomically write the metrics of the run to servicereport.prom in the
+    given directory, the collector never reads a partially written file.
+
+    Returns:
+    True on success else False"""
+
+    log = get_default_logger()
+    textfile = os.path.join(textfile_dir, PROMETHEUS_TEXTFILE)
+
+    data = "".join(family.format() for family in
+                   get_metric_families(validation_results, plugin_durations))
+
+    if not write_file_atomic(textfile, data):
+        log.warning("Failed to write the metrics to %s", textfile)
+        return False
+
+    log.debug("Metrics written to %s", textfile)
+    return True
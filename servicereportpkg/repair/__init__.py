@@ -6,10 +6,34 @@
 """Driving module for repair package"""
 
 
+import threading
+import contextvars
+
 from servicereportpkg.global_context import TOOL_NAME
 from servicereportpkg.logger import get_default_logger
+from servicereportpkg.repair.journal import RepairJournal
 from servicereportpkg.repair.plugins import RepairPluginHandler
-from servicereportpkg.logger import change_log_identifier
+from servicereportpkg.logger import log_identifier
+from servicereportpkg.profiling import profiled, is_profiling_enabled
+
+
+class RepairJob(object):
+    """Repair plugin along with the validation plugin objects it repairs
+    and the resources it modifies"""
+
+    def __init__(self, name, repair_plugin_obj, plugin_objs):
+        self.name = name
+        self.repair_plugin_obj = repair_plugin_obj
+        self.plugin_objs = plugin_objs
+        self.resources = repair_plugin_obj.get_resources(plugin_objs)
+
+    def is_conflicting(self, job):
+        """Returns True if both the jobs may modify a common resource"""
+
+        if self.resources is None or job.resources is None:
+            return True
+
+        return bool(set(self.resources) & set(job.resources))
 
 
 class Repair(object):
@@ -19,25 +43,92 @@ class Repair(object):
         self.cmd_opts = cmd_opts
         self.log = get_default_logger()
         self.repair_plugin_handler = RepairPluginHandler()
+        self.journal = RepairJournal()
+        self.job_cond = threading.Condition()
 
-    def repair(self, validation_results):
-        """Go through all the validation plugins and try to
-        fix the failed plugins by calling their corresponding
-        repair plugin if available."""
+    def get_repair_jobs(self, validation_results):
+        """Returns the list of repair jobs in validation order"""
 
+        repair_jobs = []
         repair_plugins = self.repair_plugin_handler.get_repair_plugins()
 
-        self.log.debug("Start repairing the failed plugins.")
         for plugin in validation_results.keys():
             # Find whether repair plugin is available or not
             if plugin in repair_plugins.keys():
                 repair_plugin_obj = repair_plugins[plugin]()
-
-                change_log_identifier(TOOL_NAME+ '.' + plugin, self.log)
-
-                for plugin_obj in validation_results[plugin]:
-                    repair_plugin_obj.repair(plugin_obj, plugin_obj.checks)
+                repair_plugin_obj.set_journal(self.journal)
+                repair_jobs.append(RepairJob(plugin, repair_plugin_obj,
+                                             validation_results[plugin]))
             else:
                 self.log.debug("Repair plugin is not available for %s", plugin)
 
-        change_log_identifier(TOOL_NAME, self.log)
+        return repair_jobs
+
+    def do_repair_plugin(self, job):
+        """Execute the repair plugin"""
+
+        with log_identifier(TOOL_NAME + '.' + job.name, plugin=job.name), \
+                profiled("repair", job.name):
+            for plugin_obj in job.plugin_objs:
+                try:
+                    job.repair_plugin_obj.repair(plugin_obj,
+                                                 plugin_obj.checks)
+                except Exception as exception:
+                    self.log.error("Failed to execute repair plugin: %s "
+                                   "reason: %s", job.name, exception)
+
+    def run_repair_job(self, job, running_jobs):
+        """Thread target, repairs the plugin and wakes up the scheduler"""
+
+        try:
+            self.do_repair_plugin(job)
+        finally:
+            with self.job_cond:
+                running_jobs.remove(job)
+                self.job_cond.notify()
+
+    def repair(self, validation_results):
+        """Go through all the validation plugins and try to
+        fix the failed plugins by calling their corresponding
+        repair plugin if available.
+
+        Repair plugins that do not share any resource are executed
+        concurrently. A repair plugin waits for every running plugin and
+        every plugin listed before it that modifies a common resource.
+
+        Every repair action is recorded in the repair journal, with resume
+        option the successful actions of an interrupted run are skipped.
+
+        A profiled run repairs one plugin at a time, a profiler sees only
+        its own thread and only one may be active at a time."""
+
+        self.journal.start(self.cmd_opts.resume)
+        pending_jobs = self.get_repair_jobs(validation_results)
+        running_jobs = []
+
+        self.log.debug("Start repairing the failed plugins.")
+        with self.job_cond:
+            while pending_jobs or running_jobs:
+                for job in list(pending_jobs):
+                    if running_jobs and is_profiling_enabled():
+                        break
+
+                    blockers = running_jobs + \
+                        pending_jobs[:pending_jobs.index(job)]
+                    if any(job.is_conflicting(blocker) for blocker in blockers):
+                        continue
+
+                    pending_jobs.remove(job)
+                    running_jobs.append(job)
+                    self.log.debug("Repairing %s, resources: %s",
+                                   job.name, job.resources)
+                    # Each job logs with its own identifier in a copy of
+                    # the current context
+                    threading.Thread(target=contextvars.copy_context().run,
+                                     args=(self.run_repair_job, job,
+                                           running_jobs),
+                                     name="repair-" + job.name).start()
+
+                self.job_cond.wait()
+
+        self.journal.complete()
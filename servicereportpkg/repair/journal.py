@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Journal of the repair actions performed during a repair run. An
+interrupted repair run can be resumed from the journal without repeating
+the actions that already succeeded."""
+
+
+import json
+import time
+import threading
+
+from servicereportpkg.check import Notes
+from servicereportpkg.global_context import STATE_DIR
+from servicereportpkg.utils import get_file_content
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.file_manager import write_file_atomic
+
+
+REPAIR_JOURNAL = STATE_DIR + "/repair-journal.json"
+JOURNAL_VERSION = 1
+
+
+def get_boot_id():
+    """Returns the boot id of the running kernel"""
+
+    return get_file_content("/proc/sys/kernel/random/boot_id")
+
+
+def is_action_successful(entry):
+    """Returns True if the journal entry records a successful repair"""
+
+    return entry["status"] is True or \
+        entry["note"] in [Notes.FIXED, Notes.FIXED_NEED_REBOOT]
+
+
+class RepairJournal(object):
+    """Records every completed repair action along with the check status
+    and note verified after the action"""
+
+    def __init__(self, journal_file=REPAIR_JOURNAL):
+        self.log = get_default_logger()
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        self.journal = None
+
+    def load(self):
+        """Load the journal of an interrupted repair run. Returns True only
+        if the journal belongs to the current boot and is incomplete."""
+
+        data = get_file_content(self.journal_file)
+        if data is None:
+            return False
+
+        try:
+            journal = json.loads(data)
+        except ValueError as value_error:
+            self.log.debug("Invalid repair journal %s, error: %s",
+                           self.journal_file, value_error)
+            return False
+
+        if journal.get("version") != JOURNAL_VERSION:
+            return False
+
+        if journal.get("completed"):
+            self.log.debug("Previous repair run completed, nothing to resume")
+            return False
+
+        # A reboot changes the state the recorded actions were verified
+        # against, e.g. crashkernel updates take effect.
+        if journal.get("boot_id") != get_boot_id():
+            self.log.debug("System rebooted after the previous repair run")
+            return False
+
+        self.journal = journal
+        return True
+
+    def start(self, resume=False):
+        """Start the journal for a repair run. If resume is True, continue
+        the journal of the interrupted repair run if any."""
+
+        if resume and self.load():
+            self.log.info("Resuming the repair run started at %s",
+                          time.ctime(self.journal["started"]))
+            return
+
+        self.journal = {"version": JOURNAL_VERSION,
+                        "boot_id": get_boot_id(),
+                        "started": time.time(),
+                        "completed": False,
+                        "actions": []}
+        self.save()
+
+    def save(self):
+        """Write the journal to the disk"""
+
+        if not write_file_atomic(self.journal_file,
+                                 json.dumps(self.journal, indent=1)):
+            self.log.warning("Failed to update the repair journal %s",
+                             self.journal_file)
+
+    def get_action(self, plugin, check_name, action):
+        """Returns the journal entry of the given action if it succeeded
+        in the journaled run else None"""
+
+        with self.lock:
+            for entry in reversed(self.journal["actions"]):
+                if (entry["plugin"], entry["check"], entry["action"]) == \
+                        (plugin, check_name, action):
+                    if is_action_successful(entry):
+                        return entry
+                    return None
+
+        return None
+
+    def record(self, plugin, check, action):
+        """Record the outcome of the completed repair action"""
+
+        with self.lock:
+            self.journal["actions"].append({"plugin": plugin,
+                                            "check": check.get_name(),
+                                            "action": action,
+                                            "status": check.get_status(),
+                                            "note": check.get_note(),
+                                            "time": time.time()})
+            self.save()
+
+    def complete(self):
+        """Mark the repair run completed"""
+
+        with self.lock:
+            self.journal["completed"] = True
+            self.save()
@@ -6,8 +6,70 @@
 """Parent module for all repair plugins"""
 
 
+import functools
+
+from servicereportpkg.check import Notes
 from servicereportpkg.logger import get_default_logger
 from servicereportpkg.utils import get_package_classes
+from servicereportpkg.timings import timed
+
+
+class Resources(object):
+    """Names the system resources modified by the repair plugins. Repair
+    plugins sharing a resource are never executed concurrently."""
+
+    PACKAGE_MANAGER = "package-manager"
+    BOOT_CONFIG = "boot-config"
+    KERNEL_MODULES = "kernel-modules"
+
+    @staticmethod
+    def unit(name):
+        """Returns the resource name of a systemd unit"""
+
+        return "unit:" + name
+
+    @staticmethod
+    def file(path):
+        """Returns the resource name of a file or directory"""
+
+        return "file:" + path
+
+
+def repair_action(action):
+    """Decorator for the repair actions of repair plugins, the check to
+    repair must be the last positional argument of the action. The outcome
+    of the action is recorded in the repair journal. If the journal of a
+    resumed repair run records a fix that needs a reboot, the action is
+    skipped and the recorded outcome is applied to the check. The other
+    fixes take effect at once, the check failing again means the fix was
+    undone, so the action is executed again."""
+
+    @functools.wraps(action)
+    def journaled_action(self, *args, **kwargs):
+        check = args[-1]
+
+        if self.journal is not None:
+            entry = self.journal.get_action(self.get_name(), check.get_name(),
+                                            action.__name__)
+            if entry is not None and \
+                    entry["note"] == Notes.FIXED_NEED_REBOOT:
+                self.log.info("%s: %s already completed, skipping",
+                              check.get_name(), action.__name__)
+                check.set_status(entry["status"])
+                check.set_note(entry["note"])
+                return None
+
+        with timed("repair", "%s: %s" % (action.__name__, check.get_name()),
+                   self.get_name()):
+            result = action(self, *args, **kwargs)
+
+        if self.journal is not None:
+            self.journal.record(self.get_name(), check, action.__name__)
+
+        return result
+
+    return journaled_action
+
 
 class RepairPlugin(object):
     """Base class for the Repair Plugins"""
@@ -15,17 +77,31 @@ class RepairPlugin(object):
     def __init__(self):
         self.name = RepairPlugin.__name__
         self.log = get_default_logger()
+        self.journal = None
 
     def get_name(self):
         """Returns the repair plugin name"""
 
         return self.name
 
+    def set_journal(self, journal):
+        """Set the journal to record the repair actions"""
+
+        self.journal = journal
+
+    def get_resources(self, plugin_objs):
+        """Returns the list of resources the repair plugin may modify
+        while repairing the given validation plugin objects. None means
+        the resources are unknown, such a plugin is executed alone."""
+
+        return None
+
     def repair(self, plugin_obj, checks):
         """Repair and update the status of all the received checks"""
 
         pass
 
+
 class RepairPluginHandler(object):
     """Handles the repair plugin package"""
 
@@ -6,7 +6,8 @@
 """Plugin to repair the daemon checks"""
 
 
-from servicereportpkg.repair.plugins import RepairPlugin
+from servicereportpkg.repair.plugins import RepairPlugin, Resources
+from servicereportpkg.repair.plugins import repair_action
 from servicereportpkg.utils import enable_daemon, restart_service
 from servicereportpkg.check import Notes
 
@@ -17,27 +18,43 @@ class DaemonRepair(RepairPlugin):
         RepairPlugin.__init__(self)
         self.name = "Daemon"
 
+    def get_resources(self, plugin_objs):
+        """Daemon repair only touches the units of the checked daemons"""
+
+        resources = []
+        for plugin_obj in plugin_objs:
+            for check in plugin_obj.checks:
+                resources.append(Resources.unit(check.get_name()))
+
+        return resources
+
+    @repair_action
+    def fix_daemon(self, check):
+        """Enable and start the daemon"""
+
+        daemon = check.get_name()
+        enabled = check.is_daemon_enabled()
+        active = check.is_daemon_active()
+
+        if not enabled:
+            enabled = enable_daemon(daemon)
+            if enabled:
+                check.set_daemon_enabled(True)
+
+        if not active:
+            active = restart_service(daemon)
+            if active:
+                check.set_daemon_active(True)
+
+        if enabled and active:
+            check.set_status(True)
+            check.set_note(Notes.FIXED)
+        else:
+            check.set_note("Failed to enable/start %s" % daemon)
+
     def repair(self, plugin_obj, checks):
         """Repair daemon checks"""
 
         for check in checks:
             if not check.get_status():
-                daemon = check.get_name()
-                enabled = check.is_daemon_enabled()
-                active = check.is_daemon_active()
-
-                if not enabled:
-                    enabled = enable_daemon(daemon)
-                    if enabled:
-                        check.set_daemon_enabled(True)
-
-                if not active:
-                    active = restart_service(daemon)
-                    if active:
-                        check.set_daemon_active(True)
-
-                if enabled and active:
-                    check.set_status(True)
-                    check.set_note(Notes.FIXED)
-                else:
-                    check.set_note("Failed to enable/start %s" % daemon)
+                self.fix_daemon(check)
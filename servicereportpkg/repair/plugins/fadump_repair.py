@@ -13,7 +13,8 @@ from servicereportpkg.check import Notes
 from servicereportpkg.utils import restart_service
 from servicereportpkg.utils import execute_command
 from servicereportpkg.file_manager import backup_file
-from servicereportpkg.repair.plugins import RepairPlugin
+from servicereportpkg.repair.plugins import RepairPlugin, Resources
+from servicereportpkg.repair.plugins import repair_action
 from servicereportpkg.utils import start_service
 from servicereportpkg.utils import update_grub, install_package
 from servicereportpkg.logger import get_default_logger
@@ -29,6 +30,19 @@ class FadumpRepair(RepairPlugin):
         self.name = "FADump"
         self.log = get_default_logger()
 
+    def get_resources(self, plugin_objs):
+        """FADump repair installs packages, updates the boot configuration,
+        the kdump sysconfig file and restarts the dump service"""
+
+        resources = [Resources.PACKAGE_MANAGER, Resources.BOOT_CONFIG,
+                     Resources.file("/etc/sysconfig/kdump"),
+                     Resources.file("/sys/kernel/fadump_registered")]
+        for plugin_obj in plugin_objs:
+            resources.append(Resources.unit(plugin_obj.dump_service_name))
+
+        return resources
+
+    @repair_action
     def fix_kexec_package(self, plugin_obj, check):
         """Instal kexec package"""
 
@@ -41,6 +55,7 @@ class FadumpRepair(RepairPlugin):
         else:
             check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_kdump_package(self, plugin_obj, check):
         """Install kdump package"""
 
@@ -53,6 +68,7 @@ class FadumpRepair(RepairPlugin):
         else:
             check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_mem_reservation(self, check):
         """Update memory reservation for capture kernel"""
 
@@ -87,6 +103,7 @@ class FadumpRepair(RepairPlugin):
                 self.log.error("Failed to restore grub file.")
             return False
 
+    @repair_action
     def fix_sysconfig_check(self, check):
         """Assign yes to KDUMP_FADUMP attribute"""
 
@@ -130,6 +147,7 @@ class FadumpRepair(RepairPlugin):
         else:
             check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_dump_comp_initrd(self, plugin_obj, service, check):
         """Restart the dump service"""
 
@@ -143,6 +161,7 @@ class FadumpRepair(RepairPlugin):
         else:
             check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_fadump_registration_check(self, plugin_obj, check):
         """Set 1 to fadump_registered sysfs file"""
 
@@ -154,6 +173,7 @@ class FadumpRepair(RepairPlugin):
         else:
             check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_service_status(self, check):
         """Restarts the dump service"""
 
@@ -12,7 +12,8 @@ import shutil
 from servicereportpkg.check import Notes
 from servicereportpkg.utils import restart_service
 from servicereportpkg.file_manager import backup_file
-from servicereportpkg.repair.plugins import RepairPlugin
+from servicereportpkg.repair.plugins import RepairPlugin, Resources
+from servicereportpkg.repair.plugins import repair_action
 from servicereportpkg.utils import start_service
 from servicereportpkg.utils import update_grub, install_package
 from servicereportpkg.logger import get_default_logger
@@ -157,6 +158,7 @@ class DumpRepair(object):
     def __init__(self):
         self.log = get_default_logger()
 
+    @repair_action
     def fix_dump_component_in_inital_ramdisk(self, plugin_obj, service, check):
         """Rerun the dump service again to populate the dump component
         in init-ramdisk."""
@@ -170,6 +172,7 @@ class DumpRepair(object):
         else:
             check.set_note(Notes.NOT_FIXABLE)
 
+    @repair_action
     def fix_service_status(self, check):
         """Restarts the dump service."""
 
@@ -197,6 +200,18 @@ class KdumpRepair(DumpRepair, RepairPlugin):
         DumpRepair.__init__(self)
         self.name = "Kdump"
 
+    def get_resources(self, plugin_objs):
+        """Kdump repair installs packages, updates the boot configuration
+        and restarts the dump service"""
+
+        resources = [Resources.PACKAGE_MANAGER, Resources.BOOT_CONFIG]
+        for plugin_obj in plugin_objs:
+            resources.append(Resources.unit(plugin_obj.dump_service_name))
+            resources.append(Resources.file(plugin_obj.kdump_conf_file))
+
+        return resources
+
+    @repair_action
     def fix_kexec_package(self, plugin_obj, check):
         """Install the kexec package"""
 
@@ -208,6 +223,7 @@ class KdumpRepair(DumpRepair, RepairPlugin):
         else:
             check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_kdump_package(self, plugin_obj, check):
         """Install kdump package, needed only for few distro"""
 
@@ -219,6 +235,7 @@ class KdumpRepair(DumpRepair, RepairPlugin):
         else:
             check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_memory_allocated_for_capture_kernel(self, check):
         """Update memory reservation for capture kernel"""
 
@@ -6,7 +6,8 @@
 """Plugin to repair the package checks"""
 
 
-from servicereportpkg.repair.plugins import RepairPlugin
+from servicereportpkg.repair.plugins import RepairPlugin, Resources
+from servicereportpkg.repair.plugins import repair_action
 from servicereportpkg.utils import install_package
 from servicereportpkg.utils import is_package_installed
 from servicereportpkg.check import Notes
@@ -19,14 +20,25 @@ class PackageRepair(RepairPlugin):
         RepairPlugin.__init__(self)
         self.name = "Package"
 
+    def get_resources(self, plugin_objs):
+        """Package repair only uses the package manager"""
+
+        return [Resources.PACKAGE_MANAGER]
+
+    @repair_action
+    def fix_package(self, check):
+        """Install the package"""
+
+        install_package(check.get_package_name())
+        if is_package_installed(check.get_package_name()):
+            check.set_status(True)
+            check.set_note(Notes.FIXED)
+        else:
+            check.set_note(Notes.FAIL_TO_FIX)
+
     def repair(self, plugin_obj, checks):
         """Repair package checks"""
 
         for check in checks:
             if not check.get_status():
-                install_package(check.get_package_name())
-                if is_package_installed(check.get_package_name()):
-                    check.set_status(True)
-                    check.set_note(Notes.FIXED)
-                else:
-                    check.set_note(Notes.FAIL_TO_FIX)
+                self.fix_package(check)
@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Plugin to repair the spyre card locality checks"""
+
+
+from servicereportpkg.check import Notes, DeviceCheck
+from servicereportpkg.utils import write_to_file
+from servicereportpkg.repair.plugins import RepairPlugin, Resources
+from servicereportpkg.repair.plugins import repair_action
+from servicereportpkg.validate.plugins.spyre import VFIO_DRIVER
+from servicereportpkg.validate.plugins.spyre_locality import IRQ_DIR
+from servicereportpkg.validate.plugins.spyre_locality import \
+    get_irq_affinity_path
+
+
+class SpyreLocalityRepair(RepairPlugin):
+    """Spyre locality repair plugin"""
+
+    def __init__(self):
+        RepairPlugin.__init__(self)
+        self.name = "SpyreLocality"
+
+    def get_resources(self, plugin_objs):
+        """Spyre locality repair updates the IRQ affinities. Binding a
+        card to the vfio driver allocates its IRQs again, the IRQs are
+        pinned once the spyre repair completed."""
+
+        return [Resources.file(IRQ_DIR),
+                Resources.file("/sys/bus/pci/drivers/" + VFIO_DRIVER)]
+
+    @repair_action
+    def fix_irq_affinity(self, plugin_obj, locality_check):
+        """Pin the IRQs of the spyre card to the CPUs local to the card"""
+
+        pci_address = locality_check.get_device()
+        check_method = plugin_obj.get_check_method(locality_check.get_name())
+
+        # The IRQs found by the validation are gone if the card was bound
+        # to another driver since
+        plugin_obj.refresh_inventory()
+        attributes = getattr(plugin_obj, check_method)().get_attributes()
+
+        for attribute, val in attributes.items():
+            if not attribute.startswith("irq ") or val["status"]:
+                continue
+
+            irq = int(attribute.split()[1])
+            self.log.info("Pinning spyre card %s IRQ %d to CPUs %s",
+                          pci_address, irq, val["expected_value"])
+            if not write_to_file(get_irq_affinity_path(irq),
+                                 val["expected_value"]):
+                self.log.error("Failed to set the affinity of IRQ %d", irq)
+
+        re_check = getattr(plugin_obj, check_method)()
+        if re_check.get_status():
+            locality_check.set_status(True)
+            locality_check.set_note(Notes.FIXED)
+            locality_check.set_message(
+                "\nIRQ affinities are not persistent, irqbalance may move "
+                "the IRQs again.\n")
+        elif re_check.get_attributes().get("iommu_group",
+                                           {}).get("status") is False:
+            # Sharing the IOMMU group needs a slot or firmware change
+            locality_check.set_note(Notes.NOT_FIXABLE)
+        else:
+            locality_check.set_note(Notes.FAIL_TO_FIX)
+
+    def repair(self, plugin_obj, checks):
+        """Repair spyre locality checks"""
+
+        for check in checks:
+            if not isinstance(check, DeviceCheck):
+                continue
+
+            if check.get_status() is False:
+                self.fix_irq_affinity(plugin_obj, check)
+            elif check.get_status() is None:
+                check.set_note(Notes.FAIL_TO_FIX)
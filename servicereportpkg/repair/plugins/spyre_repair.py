@@ -7,12 +7,15 @@
 
 
 import os
-import stat
 
-from servicereportpkg.check import Notes
-from servicereportpkg.utils import append_to_file
+from servicereportpkg.check import Notes, DeviceCheck
+from servicereportpkg.utils import write_to_file
 from servicereportpkg.utils import execute_command
-from servicereportpkg.repair.plugins import RepairPlugin
+from servicereportpkg.repair.plugins import RepairPlugin, Resources
+from servicereportpkg.repair.plugins import repair_action
+from servicereportpkg.validate.plugins.spyre import VFIO_DRIVER
+from servicereportpkg.validate.plugins.spyre import PCI_DEVICES_DIR
+from servicereportpkg.validate.plugins.spyre import get_spyre_cards
 
 
 class SpyreRepair(RepairPlugin):
@@ -22,66 +25,36 @@ class SpyreRepair(RepairPlugin):
         RepairPlugin.__init__(self)
         self.name = "Spyre"
 
-    def fix_vfio_drive_config(self, plugin_obj, vfio_drive_config_check):
-        """Fix vifo driver config"""
+    def get_resources(self, plugin_objs):
+        """Spyre repair updates its own configuration files, the group
+        database, the vfio device nodes and loads the vfio module"""
 
-        for config, val in vfio_drive_config_check.get_config_attributes().items():
-            if not val["status"]:
-                conf = "\noptions " + config[0] + " "
-                conf = conf + config[1] + "=" + val["possible_values"]
-                append_to_file(vfio_drive_config_check.get_file_path(), conf)
+        resources = [Resources.KERNEL_MODULES,
+                     Resources.file("/etc/group"),
+                     Resources.file("/dev/vfio"),
+                     Resources.file("/sys/bus/pci/drivers/" + VFIO_DRIVER)]
+        for plugin_obj in plugin_objs:
+            for check in plugin_obj.checks:
+                if hasattr(check, "get_file_path"):
+                    resources.append(Resources.file(check.get_file_path()))
 
-        re_check = plugin_obj.check_driver_config()
-        if re_check.get_status():
-            vfio_drive_config_check.set_status(True)
-            vfio_drive_config_check.set_note(Notes.FIXED)
-        else:
-            vfio_drive_config_check.set_status(Notes.FAIL_TO_FIX)
-
-    def fix_user_mem_conf(self, plugin_obj, user_mem_conf_check):
-        """Fix memory configuration usergroup"""
-
-        for config, val in user_mem_conf_check.get_config_attributes().items():
-            if not val["status"]:
-                append_to_file(user_mem_conf_check.get_file_path(),
-                               "\n"+config)
-
-        re_check = plugin_obj.check_memlock_conf()
-        if re_check.get_status():
-            user_mem_conf_check.set_status(True)
-            user_mem_conf_check.set_note(Notes.FIXED)
-        else:
-            user_mem_conf_check.set_note(Notes.FAIL_TO_FIX)
-
-    def fix_udev_rules_conf(self, plugin_obj, udev_rules_conf_check):
-        """Fix VFIO udev rules"""
+        return resources
 
-        for config, val in udev_rules_conf_check.get_config_attributes().items():
-            if not val["status"]:
-                append_to_file(udev_rules_conf_check.get_file_path(),
-                               "\n"+config)
-        re_check = plugin_obj.check_udev_rule()
-        if re_check.get_status():
-            udev_rules_conf_check.set_status(True)
-            udev_rules_conf_check.set_note(Notes.FIXED)
-        else:
-            udev_rules_conf_check.set_note(Notes.FAIL_TO_FIX)
+    @repair_action
+    def fix_config_file(self, plugin_obj, conf_check):
+        """Append the missing directives to the configuration file"""
 
-    def fix_pci_conf(self, plugin_obj, pci_conf_check):
-        """Fix VFIO PCI configuration"""
+        check_method = plugin_obj.get_check_method(conf_check.get_name())
+        plugin_obj.get_config_file(check_method).fix()
 
-        for config, val in pci_conf_check.get_config_attributes().items():
-            if not val["status"]:
-                append_to_file(pci_conf_check.get_file_path(),
-                               "\n"+config)
-
-        re_check = plugin_obj.check_vfio_pci_conf()
+        re_check = getattr(plugin_obj, check_method)()
         if re_check.get_status():
-            pci_conf_check.set_status(True)
-            pci_conf_check.set_note(Notes.FIXED)
+            conf_check.set_status(True)
+            conf_check.set_note(Notes.FIXED)
         else:
-            pci_conf_check.set_note(Notes.FAIL_TO_FIX)
+            conf_check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_user_group_conf(self, plugin_obj, user_group_conf_check):
         """Fix VFIO user group"""
 
@@ -98,6 +71,7 @@ class SpyreRepair(RepairPlugin):
         else:
             user_group_conf_check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_vfio_kernel_mod(self, plugin_obj, vfio_kernel_mod_check):
         """Fix VFIO kernel module"""
 
@@ -110,16 +84,16 @@ class SpyreRepair(RepairPlugin):
         else:
             vfio_kernel_mod_check.set_note(Notes.FAIL_TO_FIX)
 
+    @repair_action
     def fix_vfio_perm_check(self, plugin_obj, vfio_device_permission_check):
         """Fix VFIO device permission"""
 
-        vfio_dir = "/dev/vfio/"
-        for name in os.listdir(vfio_dir):
-            full_path = vfio_dir + name
+        for full_path, status in vfio_device_permission_check.get_files().items():
+            if status:
+                continue
+
             try:
-                mode = os.stat(full_path).st_mode
-                if stat.S_ISCHR(mode):
-                    os.chmod(full_path, 0o666)
+                os.chmod(full_path, 0o666)
             except Exception as e:
                 self.log.error("Failed to %s file permission to 0o666", full_path)
 
@@ -130,6 +104,58 @@ class SpyreRepair(RepairPlugin):
         else:
             vfio_device_permission_check.set_note(Notes.FAIL_TO_FIX)
 
+    def bind_vfio_driver(self, pci_address, driver):
+        """Bind the PCI device to the vfio driver"""
+
+        device_path = PCI_DEVICES_DIR + "/" + pci_address
+
+        if not write_to_file(device_path + "/driver_override", VFIO_DRIVER):
+            return False
+
+        if driver is not None and \
+                not write_to_file(device_path + "/driver/unbind", pci_address):
+            return False
+
+        return write_to_file(os.path.dirname(PCI_DEVICES_DIR) +
+                             "/drivers_probe", pci_address)
+
+    @repair_action
+    def fix_card(self, plugin_obj, card_check):
+        """Bind the spyre card to the vfio driver and make its vfio group
+        device accessible"""
+
+        pci_address = card_check.get_device()
+        attributes = card_check.get_attributes()
+
+        driver = attributes["driver"]
+        if not driver["status"]:
+            self.log.info("Binding spyre card %s to %s driver",
+                          pci_address, VFIO_DRIVER)
+            if not self.bind_vfio_driver(pci_address, driver["value_found"]):
+                self.log.error("Failed to bind spyre card %s to %s driver",
+                               pci_address, VFIO_DRIVER)
+
+            # Wait for udev to create the vfio group device
+            execute_command(["udevadm", "settle"])
+
+        card = get_spyre_cards(refresh=True).get(pci_address)
+        if card is not None and card.vfio_mode is not None and \
+                card.vfio_mode & 0o666 != 0o666:
+            try:
+                os.chmod(card.vfio_device, 0o666)
+            except Exception as e:
+                self.log.error("Failed to %s file permission to 0o666",
+                               card.vfio_device)
+
+        get_spyre_cards(refresh=True)
+        check_method = plugin_obj.get_check_method(card_check.get_name())
+        re_check = getattr(plugin_obj, check_method)()
+        if re_check.get_status():
+            card_check.set_status(True)
+            card_check.set_note(Notes.FIXED)
+        else:
+            card_check.set_note(Notes.FAIL_TO_FIX)
+
     def repair(self, plugin_obj, checks):
         """Repair spyre checks"""
 
@@ -146,29 +172,20 @@ class SpyreRepair(RepairPlugin):
         for check in checks:
             check_dir[check.get_name()] = check
 
-        vfio_drive_config_check = check_dir["VFIO Driver configuration"]
-        if vfio_drive_config_check.get_status() is False:
-            self.fix_vfio_drive_config(plugin_obj, vfio_drive_config_check)
-        elif vfio_drive_config_check.get_status() is None:
-            vfio_drive_config_check.set_note(Notes.FAIL_TO_FIX)
-
-        user_mem_conf_check = check_dir["User memlock configuration"]
-        if user_mem_conf_check.get_status() is False:
-            self.fix_user_mem_conf(plugin_obj, user_mem_conf_check)
-        elif user_mem_conf_check.get_status() is None:
-            user_mem_conf_check.set_note(Notes.FAIL_TO_FIX)
-
-        udev_rules_conf_check = check_dir["VFIO udev rules configuration"]
-        if udev_rules_conf_check.get_status() is False:
-            self.fix_udev_rules_conf(plugin_obj, udev_rules_conf_check)
-        elif udev_rules_conf_check.get_status() is None:
-            udev_rules_conf_check.set_note(Notes.FAIL_TO_FIX)
-
-        pci_conf_check = check_dir["VFIO module dep configuration"]
-        if pci_conf_check.get_status() is False:
-            self.fix_pci_conf(plugin_obj, pci_conf_check)
-        elif pci_conf_check.get_status() is None:
-            pci_conf_check.set_note(Notes.FAIL_TO_FIX)
+        for check_name in ["VFIO Driver configuration",
+                           "User memlock configuration",
+                           "VFIO udev rules configuration",
+                           "VFIO module dep configuration"]:
+            conf_check = check_dir[check_name]
+            if check_name == "User memlock configuration" and \
+                    not plugin_obj.is_memlock_limit_allowed():
+                # Raising the limit would let the group pin most of memory
+                if conf_check.get_status() is False:
+                    conf_check.set_note(Notes.NOT_FIXABLE)
+            elif conf_check.get_status() is False:
+                self.fix_config_file(plugin_obj, conf_check)
+            elif conf_check.get_status() is None:
+                conf_check.set_note(Notes.FAIL_TO_FIX)
 
         user_group_conf_check = check_dir["User group configuration"]
         if user_group_conf_check.get_status() is False:
@@ -176,6 +193,7 @@ class SpyreRepair(RepairPlugin):
         elif user_group_conf_check.get_status() is None:
             user_group_conf_check.set_note(Notes.FAIL_TO_FIX)
 
+        user_mem_conf_check = check_dir["User memlock configuration"]
         if user_group_conf_check.get_status() and user_mem_conf_check.get_status():
             user_mem_conf_check.set_message(memlock_limit_message)
 
@@ -185,6 +203,12 @@ class SpyreRepair(RepairPlugin):
         elif vfio_kernel_mod_check.get_status() is None:
             vfio_kernel_mod_check.set_note(Notes.FAIL_TO_FIX)
 
+        # Only the failed cards are fixed, the kernel module must be
+        # loaded to bind a card to the vfio driver
+        for check in checks:
+            if isinstance(check, DeviceCheck) and check.get_status() is False:
+                self.fix_card(plugin_obj, check)
+
         vfio_device_permission_check = check_dir["VFIO device permission"]
         if vfio_device_permission_check.get_status() is False:
             self.fix_vfio_perm_check(plugin_obj, vfio_device_permission_check)
@@ -7,6 +7,22 @@
 
 
 import os
+import sys
+import json
+import time
+import threading
+
+from servicereportpkg.check import get_status_msg
+from servicereportpkg.global_context import RUN_ID
+from servicereportpkg.timings import get_spans, is_timings_enabled
+from servicereportpkg.memory import get_memory_usages
+
+
+# Version of the JSON and NDJSON report schema, incremented on
+# incompatible changes
+REPORT_SCHEMA_VERSION = 1
+
+REPORT_FORMATS = ["console", "json", "ndjson"]
 
 
 class Color():
@@ -36,15 +52,49 @@ def get_colored_status_msg(status):
                        "FAIL": Color.RED,
                        "UNKNOWN": Color.YELLOW}
 
-    status_msg = "PASS"
-    if status is False:
-        status_msg = "FAIL"
-    elif status is None:
-        status_msg = "UNKNOWN"
+    status_msg = get_status_msg(status)
 
     return color_msg(status_msg, status_to_color[status_msg])
 
 
+def print_plugin_report(plugin_objs, cmd_opts, detailed=None):
+    """Prints the section of a plugin [Plugin Description | Plugin status].
+    If detailed, or user either choose verbose or repair option, every
+    check of the plugin is printed as well."""
+
+    plugin_description = plugin_objs[0].get_description()
+    overall_status = True
+    for plugin in plugin_objs:
+        if not plugin.get_plugin_status():
+            overall_status = False
+            break
+
+    print("{0:52}{1}\n".format(plugin_description,
+                               get_colored_status_msg(overall_status)))
+
+    if detailed is None:
+        detailed = cmd_opts.verbose >= 1 or cmd_opts.repair
+
+    if not detailed:
+        return
+
+    for plugin_obj in plugin_objs:
+        for check in plugin_obj.checks:
+            if check.get_note() is None:
+                print("  {0:50}{1}".format(check.get_name(),
+                                           get_colored_status_msg(check.get_status())))
+            else:
+                print("  {0:50}{1:20}{2}".format(check.get_name(),
+                                                 get_colored_status_msg(check.get_status()),
+                                                 check.get_note()))
+
+        for check in plugin_obj.checks:
+            message = check.get_message()
+            if message is not None:
+                print(message)
+    print('\n')
+
+
 def print_report_on_console(validation_results, cmd_opts):
     """Prints the report on the terminal in table format
     [Plugin Description | Plugin status].
@@ -54,37 +104,297 @@ def print_report_on_console(validation_results, cmd_opts):
     during the validation."""
 
     for key in validation_results.keys():
-        plugin_description = validation_results[key][0].get_description()
-        overall_status = True
-        for plugin in validation_results[key]:
-            if not plugin.get_plugin_status():
-                overall_status = False
-                break
+        print_plugin_report(validation_results[key], cmd_opts)
+
+
+def generate_report(validation_results, cmd_opts):
+    """Generate the report based on the validation results"""
+
+    print_report_on_console(validation_results, cmd_opts)
 
-        print("{0:52}{1}\n".format(plugin_description,
-                                   get_colored_status_msg(overall_status)))
 
-        if cmd_opts.verbose < 1 and not cmd_opts.repair:
-            continue
+def get_run_status(validation_results):
+    """Returns True only if all the plugins succeed"""
 
+    for key in validation_results:
         for plugin_obj in validation_results[key]:
-            for check in plugin_obj.checks:
-                if check.get_note() is None:
-                    print("  {0:50}{1}".format(check.get_name(),
-                                               get_colored_status_msg(check.get_status())))
-                else:
-                    print("  {0:50}{1:20}{2}".format(check.get_name(),
-                                                     get_colored_status_msg(check.get_status()),
-                                                     check.get_note()))
-
-            for check in plugin_obj.checks:
-                message = check.get_message()
-                if message is not None:
-                    print(message)
-        print('\n')
+            if not plugin_obj.get_plugin_status():
+                return False
 
+    return True
 
-def generate_report(validation_results, cmd_opts):
-    """Generate the report based on the validation results"""
 
-    print_report_on_console(validation_results, cmd_opts)
+class Reporter(object):
+    """Base class of the reporters. The validation calls plugin_started
+    and plugin_completed for every plugin, finish is called once the
+    validation and the repair are over. In watch mode check_changed is
+    called for every check validated again."""
+
+    def __init__(self, cmd_opts=None, stream=None):
+        self.cmd_opts = cmd_opts
+        self.stream = stream if stream is not None else sys.stdout
+        self.plugin_start_times = {}
+        self.plugin_durations = {}
+
+    def plugin_started(self, plugin_name, plugin_objs):
+        """Called before the plugin objects are executed"""
+
+        self.plugin_start_times[plugin_name] = time.monotonic()
+
+    def plugin_completed(self, plugin_name, plugin_objs):
+        """Called once the plugin objects completed their checks"""
+
+        start_time = self.plugin_start_times.pop(plugin_name, None)
+        if start_time is not None:
+            self.plugin_durations[plugin_name] = \
+                round((time.monotonic() - start_time) * 1000, 3)
+
+    def finish(self, validation_results):
+        """Called once the validation and the repair are over"""
+
+        pass
+
+    def check_changed(self, plugin_name, plugin_obj, old_check, new_check,
+                      changed_inputs):
+        """Called once a check is validated again since its inputs
+        changed, old_check is None if the check was not performed
+        before"""
+
+        pass
+
+
+class ProgressLine(object):
+    """Shows the plugin being executed along with the elapsed time on the
+    last line of the terminal"""
+
+    def __init__(self, stream, description):
+        self.stream = stream
+        self.description = description
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.update, daemon=True)
+
+    def update(self):
+        """Redraw the progress line until stopped"""
+
+        start_time = time.monotonic()
+        while True:
+            self.stream.write("\r{0:52}{1:.0f}s".format(
+                self.description, time.monotonic() - start_time))
+            self.stream.flush()
+            if self.stop_event.wait(0.5):
+                break
+
+    def start(self):
+        """Start drawing the progress line"""
+
+        self.thread.start()
+
+    def stop(self):
+        """Stop drawing and erase the progress line"""
+
+        self.stop_event.set()
+        self.thread.join()
+        self.stream.write("\r\033[K")
+        self.stream.flush()
+
+
+class ConsoleReporter(Reporter):
+    """Prints the report table on the terminal. The section of a plugin is
+    printed as soon as the plugin completes, on a terminal a progress line
+    shows the plugin being executed. With repair, the sections show only
+    the plugin status and the detailed report is printed once the repair
+    is over."""
+
+    def __init__(self, cmd_opts=None, stream=None):
+        Reporter.__init__(self, cmd_opts, stream)
+        self.progress = None
+
+    def plugin_started(self, plugin_name, plugin_objs):
+        Reporter.plugin_started(self, plugin_name, plugin_objs)
+
+        if self.stream.isatty():
+            self.progress = ProgressLine(self.stream,
+                                         plugin_objs[0].get_description())
+            self.progress.start()
+
+    def plugin_completed(self, plugin_name, plugin_objs):
+        Reporter.plugin_completed(self, plugin_name, plugin_objs)
+
+        if self.progress is not None:
+            self.progress.stop()
+            self.progress = None
+
+        if self.cmd_opts.repair:
+            print_plugin_report(plugin_objs, self.cmd_opts, detailed=False)
+        else:
+            print_plugin_report(plugin_objs, self.cmd_opts)
+
+    def finish(self, validation_results):
+        if self.cmd_opts.repair:
+            print_report_on_console(validation_results, self.cmd_opts)
+
+    def check_changed(self, plugin_name, plugin_obj, old_check, new_check,
+                      changed_inputs):
+        old_status = old_check.get_status() if old_check else None
+        print("{0} {1}: {2:45}{3} -> {4}".format(
+            time.strftime("%H:%M:%S"), plugin_name, new_check.get_name(),
+            get_colored_status_msg(old_status),
+            get_colored_status_msg(new_check.get_status())))
+        self.stream.flush()
+
+
+class MachineReporter(Reporter):
+    """Base class of the machine readable reporters"""
+
+    def __init__(self, cmd_opts, stream=None, tool_version=None):
+        Reporter.__init__(self, cmd_opts, stream)
+        self.tool_version = tool_version
+        self.started = time.time()
+
+    def get_check_record(self, check):
+        """Returns the check with all the fields of its class"""
+
+        record = check.to_dict()
+        record["status_msg"] = get_status_msg(check.get_status())
+        return record
+
+    def get_plugin_record(self, plugin_name, plugin_obj):
+        """Returns the plugin along with its checks"""
+
+        return {"name": plugin_name,
+                "class": plugin_obj.__class__.__name__,
+                "description": plugin_obj.get_description(),
+                "status": get_status_msg(plugin_obj.get_plugin_status()),
+                "duration_ms": self.plugin_durations.get(plugin_name),
+                "checks": [self.get_check_record(check)
+                           for check in plugin_obj.checks]}
+
+    def write(self, data):
+        """Write to the report stream and flush it"""
+
+        self.stream.write(data)
+        self.stream.flush()
+
+
+class JSONReporter(MachineReporter):
+    """Writes the whole run as a JSON document. The plugins are
+    serialized one at a time, the report is never held in memory."""
+
+    def finish(self, validation_results):
+        header = {"schema": REPORT_SCHEMA_VERSION,
+                  "tool_version": self.tool_version,
+                  "run_id": RUN_ID,
+                  "started": self.started,
+                  "repair": bool(self.cmd_opts.repair)}
+
+        # Stream the plugins array between the header and the summary
+        self.write(json.dumps(header)[:-1] + ', "plugins": [')
+
+        separator = ""
+        for plugin_name in validation_results:
+            for plugin_obj in validation_results[plugin_name]:
+                self.write(separator + json.dumps(
+                    self.get_plugin_record(plugin_name, plugin_obj)))
+                separator = ", "
+
+        if is_timings_enabled():
+            self.write('], "timings": ' +
+                       json.dumps([span.to_dict() for span in get_spans()]) +
+                       ', "memory": ' +
+                       json.dumps([usage.to_dict()
+                                   for usage in get_memory_usages()]))
+        else:
+            self.write(']')
+
+        status = get_status_msg(get_run_status(validation_results))
+        self.write(', "status": %s, "duration_ms": %s}\n'
+                   % (json.dumps(status),
+                      json.dumps(round((time.time() - self.started) * 1000,
+                                       3))))
+
+
+class NDJSONReporter(MachineReporter):
+    """Writes one JSON record per line. The check records of a plugin are
+    written as soon as the plugin completes, the repair outcome of the
+    checks, the timing and memory records and the run summary are
+    written at the end. In watch mode an event record follows for every
+    check validated again."""
+
+    def write_record(self, record_type, record):
+        """Write a record of the given type"""
+
+        data = {"schema": REPORT_SCHEMA_VERSION,
+                "record": record_type,
+                "run_id": RUN_ID}
+        data.update(record)
+        self.write(json.dumps(data) + "\n")
+
+    def write_check_records(self, phase, plugin_name, plugin_obj):
+        """Write a record for every check of the plugin object"""
+
+        for check in plugin_obj.checks:
+            self.write_record("check",
+                              {"phase": phase,
+                               "plugin": plugin_name,
+                               "class": plugin_obj.__class__.__name__,
+                               "check": self.get_check_record(check)})
+
+    def plugin_completed(self, plugin_name, plugin_objs):
+        MachineReporter.plugin_completed(self, plugin_name, plugin_objs)
+
+        for plugin_obj in plugin_objs:
+            self.write_check_records("validate", plugin_name, plugin_obj)
+            self.write_record("plugin",
+                              {"phase": "validate",
+                               "plugin": plugin_name,
+                               "class": plugin_obj.__class__.__name__,
+                               "description": plugin_obj.get_description(),
+                               "status": get_status_msg(
+                                   plugin_obj.get_plugin_status()),
+                               "duration_ms":
+                               self.plugin_durations.get(plugin_name)})
+
+    def check_changed(self, plugin_name, plugin_obj, old_check, new_check,
+                      changed_inputs):
+        self.write_record("event",
+                          {"event": "check_changed",
+                           "time": time.time(),
+                           "plugin": plugin_name,
+                           "class": plugin_obj.__class__.__name__,
+                           "old_status": get_status_msg(
+                               old_check.get_status()) if old_check else None,
+                           "changed_inputs": changed_inputs,
+                           "check": self.get_check_record(new_check)})
+
+    def finish(self, validation_results):
+        if self.cmd_opts.repair:
+            for plugin_name in validation_results:
+                for plugin_obj in validation_results[plugin_name]:
+                    self.write_check_records("repair", plugin_name,
+                                             plugin_obj)
+
+        if is_timings_enabled():
+            for span in get_spans():
+                self.write_record("timing", span.to_dict())
+            for usage in get_memory_usages():
+                self.write_record("memory", usage.to_dict())
+
+        self.write_record("summary",
+                          {"tool_version": self.tool_version,
+                           "started": self.started,
+                           "duration_ms":
+                           round((time.time() - self.started) * 1000, 3),
+                           "status": get_status_msg(
+                               get_run_status(validation_results))})
+
+
+def get_reporter(cmd_opts, stream=None, tool_version=None):
+    """Returns the reporter of the report format selected by the user"""
+
+    if cmd_opts.format == "json":
+        return JSONReporter(cmd_opts, stream, tool_version)
+
+    if cmd_opts.format == "ndjson":
+        return NDJSONReporter(cmd_opts, stream, tool_version)
+
+    return ConsoleReporter(cmd_opts, stream)
@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Save the validation results to a file and load them back"""
+
+
+import json
+import time
+from collections import OrderedDict
+
+from servicereportpkg.check import check_from_dict
+from servicereportpkg.utils import get_file_content
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.validate.plugins import Plugin
+from servicereportpkg.file_manager import write_file_atomic
+
+
+RESULTS_VERSION = 1
+
+
+def get_machine_id():
+    """Returns the machine id of the system"""
+
+    return get_file_content("/etc/machine-id")
+
+
+def get_results_dict(validation_results, tool_version):
+    """Returns the validation results as a JSON serializable dictionary"""
+
+    plugins = []
+    for plugin_name in validation_results:
+        for plugin_obj in validation_results[plugin_name]:
+            plugins.append({"name": plugin_name,
+                            "class": plugin_obj.__class__.__name__,
+                            "description": plugin_obj.get_description(),
+                            "checks": [check.to_dict()
+                                       for check in plugin_obj.checks]})
+
+    return {"version": RESULTS_VERSION,
+            "tool_version": tool_version,
+            "machine_id": get_machine_id(),
+            "created": time.time(),
+            "plugins": plugins}
+
+
+def get_validation_results(results, plugin_classes=None):
+    """Creates the validation results from the dictionary returned by
+    get_results_dict. The plugin objects are instances of the classes
+    in the plugin_classes dictionary, keyed by class name. Without
+    plugin_classes the plugin objects only carry the checks."""
+
+    log = get_default_logger()
+    validation_results = OrderedDict()
+
+    for plugin in results["plugins"]:
+        if plugin_classes is None:
+            plugin_obj = Plugin()
+        elif plugin["class"] in plugin_classes:
+            plugin_obj = plugin_classes[plugin["class"]]()
+        else:
+            log.warning("Saved plugin %s is not applicable to this system",
+                        plugin["class"])
+            continue
+
+        plugin_obj.name = plugin["name"]
+        plugin_obj.description = plugin["description"]
+        plugin_obj.checks = [check_from_dict(check)
+                             for check in plugin["checks"]]
+
+        if plugin["name"] not in validation_results:
+            validation_results[plugin["name"]] = []
+
+        validation_results[plugin["name"]].append(plugin_obj)
+
+    return validation_results
+
+
+def save_results(results_file, validation_results, tool_version):
+    """Save the validation results to the given file, returns True
+    on success"""
+
+    results = get_results_dict(validation_results, tool_version)
+    return write_file_atomic(results_file, json.dumps(results, indent=1))
+
+
+def load_results(results_file):
+    """Load the results saved by save_results. Raises ValueError if the
+    file is not a valid results file and IOError if it is not readable."""
+
+    with open(results_file, "r", encoding="utf-8") as o_file:
+        results = json.load(o_file)
+
+    if not isinstance(results, dict) or \
+            results.get("version") != RESULTS_VERSION:
+        raise ValueError("unsupported results format")
+
+    return results
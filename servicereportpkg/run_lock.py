@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Lock serializing the runs of the tool, a run validating or repairing
+the system holds it until the results are cached. The lock is an flock,
+it is released by the kernel if the run dies."""
+
+
+import os
+import time
+import fcntl
+
+from servicereportpkg.global_context import RUN_DIR
+from servicereportpkg.logger import get_default_logger
+
+
+RUN_LOCK = RUN_DIR + "/run.lock"
+
+
+class RunLock(object):
+    """Exclusive lock of a run, the file holds the pid of the owner"""
+
+    def __init__(self, lock_file=RUN_LOCK):
+        self.log = get_default_logger()
+        self.lock_file = lock_file
+        self.fd = None
+        self.wait_started = None
+
+    def get_owner(self):
+        """Returns the pid of the run holding the lock, None if unknown"""
+
+        try:
+            with open(self.lock_file, "r") as o_file:
+                return int(o_file.read().strip())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def acquire(self):
+        """Acquire the lock, waits for the run holding it. Returns True if
+        the lock was held by another run. The run is not serialized if the
+        lock file cannot be opened."""
+
+        try:
+            os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+            self.fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError as os_error:
+            self.log.warning("Failed to open the run lock %s, error: %s",
+                             self.lock_file, os_error)
+            return False
+
+        waited = False
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            waited = True
+            self.wait_started = time.time()
+            print("Waiting for the run in progress (pid %s) to complete"
+                  % self.get_owner())
+            self.log.info("Waiting for the run in progress to complete")
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+        os.ftruncate(self.fd, 0)
+        os.pwrite(self.fd, str(os.getpid()).encode(), 0)
+
+        return waited
+
+    def get_wait_started(self):
+        """Returns the time the run started waiting for the lock, None if
+        the lock was free"""
+
+        return self.wait_started
+
+    def release(self):
+        """Release the lock"""
+
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
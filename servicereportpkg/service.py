@@ -0,0 +1,339 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Query service answering the JSON queries for the validation results on
+a Unix socket, along with the query command, its client. The socket is
+passed by systemd or bound by the service. Refreshes are serialized, the
+clients asking for a refresh while one is running share its results."""
+
+
+import os
+import sys
+import json
+import errno
+import signal
+import socket
+import threading
+from argparse import ArgumentParser
+
+from servicereportpkg.check import get_status_msg
+from servicereportpkg.validate import Validate
+from servicereportpkg.results import get_results_dict
+from servicereportpkg.cache import save_cached_results
+from servicereportpkg.run_lock import RunLock
+from servicereportpkg.report import get_run_status
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.prometheus import write_prometheus_textfile
+
+
+SERVICE_SOCKET = "/run/servicereport.sock"
+
+# First file descriptor passed by systemd socket activation
+SD_LISTEN_FDS_START = 3
+
+# Seconds a client has to send its query
+SERVICE_CLIENT_TIMEOUT = 10
+
+# Seconds the query command waits for the answer, a refresh validates
+# the whole system
+QUERY_TIMEOUT = 600
+
+# Maximum size of a query in bytes
+QUERY_MAX_SIZE = 64 * 1024
+
+
+def get_activated_socket():
+    """Returns the listening socket passed by systemd, None if the service
+    was not socket activated"""
+
+    if os.environ.get("LISTEN_PID") != str(os.getpid()):
+        return None
+
+    try:
+        if int(os.environ.get("LISTEN_FDS", "0")) < 1:
+            return None
+    except ValueError:
+        return None
+
+    # The sockets must not leak to the processes spawned by the checks
+    os.set_inheritable(SD_LISTEN_FDS_START, False)
+    return socket.socket(fileno=SD_LISTEN_FDS_START)
+
+
+def bind_socket(socket_path):
+    """Returns a Unix socket listening on socket_path, a socket left by a
+    service that is no more running is replaced. Raises OSError if the
+    socket is in use or cannot be bound."""
+
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError as os_error:
+            if os_error.errno != errno.ECONNREFUSED:
+                raise
+            os.remove(socket_path)
+        else:
+            raise OSError(errno.EADDRINUSE, "service is already running",
+                          socket_path)
+        finally:
+            probe.close()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    listener.listen()
+
+    return listener
+
+
+def stop_serving(signum, frame):
+    """Signal handler, stops the service"""
+
+    raise SystemExit(0)
+
+
+def read_message(conn, max_size=QUERY_MAX_SIZE):
+    """Returns the JSON message read from the connection, the message ends
+    with a new line or when the peer shuts down its side. Raises
+    ValueError if the message is larger than max_size bytes."""
+
+    data = b""
+    while b"\n" not in data:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+        if max_size is not None and len(data) > max_size:
+            raise ValueError("message too large")
+
+    return json.loads(data.split(b"\n", 1)[0].decode("utf-8"))
+
+
+def write_message(conn, message):
+    """Write the message to the connection as one line of JSON"""
+
+    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+class QueryService(object):
+    """Validates the system on demand and answers the queries with the
+    latest results"""
+
+    def __init__(self, cmd_opts, tool_version):
+        self.log = get_default_logger()
+        self.cmd_opts = cmd_opts
+        self.tool_version = tool_version
+        self.socket_path = SERVICE_SOCKET
+        self.results = None
+        self.refreshing = False
+        # Number of refreshes completed, the clients waiting for a refresh
+        # are woken up once it changes
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def validate(self):
+        """Validates the system, returns the results dictionary"""
+
+        validator = Validate(self.cmd_opts)
+        with RunLock():
+            validation_results = validator.validate()
+            save_cached_results(validation_results, self.cmd_opts,
+                                self.tool_version)
+
+        if self.cmd_opts.prometheus_textfile:
+            write_prometheus_textfile(self.cmd_opts.prometheus_textfile,
+                                      validation_results,
+                                      validator.reporter.plugin_durations)
+
+        results = get_results_dict(validation_results, self.tool_version)
+        results["status"] = get_status_msg(
+            get_run_status(validation_results))
+        return results
+
+    def refresh(self):
+        """Validates the system and returns the new results. A client
+        asking for a refresh while one is running waits for it and gets
+        its results, so concurrent clients trigger one validation."""
+
+        with self.condition:
+            if self.refreshing:
+                generation = self.generation
+                self.condition.wait_for(
+                    lambda: self.generation != generation)
+                return self.results
+
+            self.refreshing = True
+
+        self.log.info("Validating the system for the queries")
+        results = None
+        try:
+            results = self.validate()
+        except Exception as exception:
+            self.log.error("Failed to validate the system, error: %s",
+                           exception)
+        finally:
+            with self.condition:
+                if results is not None:
+                    self.results = results
+                self.refreshing = False
+                self.generation += 1
+                self.condition.notify_all()
+
+        return self.results
+
+    def get_results(self, refresh=False):
+        """Returns the latest results, the system is validated if refresh
+        is True or it was not validated yet"""
+
+        with self.condition:
+            results = self.results
+
+        if refresh or results is None:
+            return self.refresh()
+
+        return results
+
+    def answer(self, query):
+        """Returns the answer of the query"""
+
+        if not isinstance(query, dict):
+            return {"error": "query must be a JSON object"}
+
+        plugins = query.get("plugins")
+        if plugins is not None and (not isinstance(plugins, list) or
+                                    not all(isinstance(plugin, str)
+                                            for plugin in plugins)):
+            return {"error": "plugins must be a list of plugin names"}
+
+        results = self.get_results(bool(query.get("refresh")))
+        if results is None:
+            return {"error": "validation failed"}
+
+        if plugins is None:
+            return results
+
+        names = set(plugin.lower() for plugin in plugins)
+        selected = [plugin for plugin in results["plugins"]
+                    if plugin["name"].lower() in names]
+        unknown = names - set(plugin["name"].lower() for plugin in selected)
+        if unknown:
+            return {"error": "plugins not validated: %s"
+                             % ", ".join(sorted(unknown))}
+
+        answer = dict(results)
+        answer["plugins"] = selected
+        answer["status"] = get_status_msg(
+            all(check["status"] for plugin in selected
+                for check in plugin["checks"]))
+        return answer
+
+    def handle_client(self, conn):
+        """Answer the query of a client"""
+
+        try:
+            conn.settimeout(SERVICE_CLIENT_TIMEOUT)
+            try:
+                query = read_message(conn)
+            except (ValueError, UnicodeDecodeError) as exception:
+                write_message(conn, {"error": "invalid query: %s"
+                                              % exception})
+                return
+
+            self.log.debug("Query: %s", query)
+            write_message(conn, self.answer(query))
+        except OSError as os_error:
+            self.log.debug("Failed to answer the query, error: %s",
+                           os_error)
+        finally:
+            conn.close()
+
+    def run(self):
+        """Answer the queries until the service is stopped"""
+
+        listener = get_activated_socket()
+        bound = listener is None
+        if bound:
+            try:
+                listener = bind_socket(self.socket_path)
+            except OSError as os_error:
+                print("Unable to listen on %s: %s" % (self.socket_path,
+                                                       os_error))
+                return 1
+
+        signal.signal(signal.SIGTERM, stop_serving)
+        self.log.info("Answering the queries on %s",
+                      listener.getsockname() or self.socket_path)
+
+        try:
+            while True:
+                (conn, _) = listener.accept()
+                threading.Thread(target=self.handle_client, args=(conn,),
+                                 name="query", daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            if bound:
+                os.remove(self.socket_path)
+
+        return 0
+
+
+def parse_query_args(args):
+    """Command line argument parser of the query command"""
+
+    parser = ArgumentParser(prog="servicereport query",
+                            description="Query the results of the "
+                                        "servicereport service")
+
+    parser.add_argument("-p", "--plugins", dest="plugins", nargs="+",
+                        default=None, metavar="PLUGIN",
+                        help="results of the given plugins only")
+
+    parser.add_argument("--refresh", action="store_true",
+                        dest="refresh", default=False,
+                        help="validate the system again before answering")
+
+    parser.add_argument("--socket", dest="socket_path",
+                        default=SERVICE_SOCKET,
+                        help="socket of the service, default %(default)s")
+
+    return parser.parse_args(args)
+
+
+def query_main(args):
+    """Entry point of the query command, prints the answer of the service
+    as JSON. Returns 0 only if the queried plugins passed."""
+
+    cmd_opts = parse_query_args(args)
+
+    query = {"refresh": cmd_opts.refresh}
+    if cmd_opts.plugins is not None:
+        query["plugins"] = cmd_opts.plugins
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(QUERY_TIMEOUT)
+    try:
+        conn.connect(cmd_opts.socket_path)
+        write_message(conn, query)
+        conn.shutdown(socket.SHUT_WR)
+        answer = read_message(conn, max_size=None)
+    except (OSError, ValueError) as exception:
+        print("Unable to query %s: %s" % (cmd_opts.socket_path, exception),
+              file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+
+    print(json.dumps(answer, indent=1))
+
+    if "error" in answer:
+        return 1
+
+    return 0 if answer.get("status") == "PASS" else 1
@@ -0,0 +1,197 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Instrumentation of the checks, the repair actions and the phases of the
+run. A span records the wall time, the CPU time, the processes spawned and
+the files read while it is active. With tracing, the spans also carry
+their start time and thread and are exported as Chrome trace events."""
+
+
+import time
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+
+
+# Innermost span active in the current context, every thread and context
+# copy keeps its own span
+current_span = contextvars.ContextVar("current_span", default=None)
+
+_timings_enabled = False
+_tracing_enabled = False
+_spans = []
+_spans_lock = threading.Lock()
+
+
+class Span(object):
+    """Resources used by a check, a repair action or a phase of the run"""
+
+    def __init__(self, kind, name, plugin=None, parent=None,
+                 trace_only=False):
+        self.kind = kind
+        self.name = name
+        self.plugin = plugin
+        self.parent = parent
+        self.trace_only = trace_only
+        self.args = {}
+        self.start_time = None
+        self.thread_id = None
+        self.thread_name = None
+        self.wall_ms = 0
+        self.cpu_ms = 0
+        self.subprocesses = 0
+        self.subprocess_ms = 0
+        self.files_read = 0
+        self.bytes_read = 0
+
+    def to_dict(self):
+        """Returns the span as a JSON serializable dictionary"""
+
+        return {"kind": self.kind,
+                "name": self.name,
+                "plugin": self.plugin,
+                "wall_ms": round(self.wall_ms, 3),
+                "cpu_ms": round(self.cpu_ms, 3),
+                "subprocesses": self.subprocesses,
+                "subprocess_ms": round(self.subprocess_ms, 3),
+                "files_read": self.files_read,
+                "bytes_read": self.bytes_read}
+
+
+def enable_timings():
+    """Record the spans of the run"""
+
+    global _timings_enabled
+
+    _timings_enabled = True
+
+
+def is_timings_enabled():
+    """Returns True if the spans of the run are recorded"""
+
+    return _timings_enabled
+
+
+def enable_tracing():
+    """Record the spans of the run along with the trace only spans, e.g.
+    the file reads"""
+
+    global _tracing_enabled
+
+    _tracing_enabled = True
+
+
+def is_tracing_enabled():
+    """Returns True if the spans of the run are recorded for the trace"""
+
+    return _tracing_enabled
+
+
+@contextmanager
+def timed(kind, name, plugin=None, trace_only=False):
+    """Record the resources used within the context as a span of the
+    given kind. Spans nest, the resources used by a span are accounted to
+    its enclosing spans as well. Trace only spans are recorded only with
+    tracing and are left out of the hot spots. The span is yielded, so
+    the context can add trace arguments, None if it is not recorded."""
+
+    if not (_tracing_enabled or _timings_enabled and not trace_only):
+        yield None
+        return
+
+    span = Span(kind, name, plugin, current_span.get(), trace_only)
+    span.thread_id = threading.get_native_id()
+    span.thread_name = threading.current_thread().name
+    token = current_span.set(span)
+    span.start_time = start_time = time.monotonic()
+    # CPU time of the calling thread, repair actions run in threads
+    start_cpu_time = time.thread_time()
+    try:
+        yield span
+    finally:
+        span.wall_ms = (time.monotonic() - start_time) * 1000
+        span.cpu_ms = (time.thread_time() - start_cpu_time) * 1000
+        current_span.reset(token)
+        with _spans_lock:
+            _spans.append(span)
+
+
+def add_span_args(**args):
+    """Add the arguments shown in the trace to the innermost span"""
+
+    span = current_span.get()
+    if span is not None:
+        span.args.update(args)
+
+
+def account_subprocess(duration):
+    """Account a process that ran for duration seconds to the active
+    spans"""
+
+    span = current_span.get()
+    while span is not None:
+        span.subprocesses += 1
+        span.subprocess_ms += duration * 1000
+        span = span.parent
+
+
+def account_file_read(size):
+    """Account a file of size bytes read to the active spans"""
+
+    span = current_span.get()
+    while span is not None:
+        span.files_read += 1
+        span.bytes_read += size
+        span = span.parent
+
+
+def get_spans(trace=False):
+    """Returns the spans recorded so far, the trace only spans are
+    included only if trace is True"""
+
+    with _spans_lock:
+        return [span for span in _spans if trace or not span.trace_only]
+
+
+def get_hot_spots():
+    """Returns the recorded spans merged by kind, plugin and name along
+    with the number of calls, the slowest first"""
+
+    hot_spots = {}
+    for span in get_spans():
+        key = (span.kind, span.plugin, span.name)
+        if key not in hot_spots:
+            hot_spots[key] = [Span(span.kind, span.name, span.plugin), 0]
+
+        total = hot_spots[key][0]
+        total.wall_ms += span.wall_ms
+        total.cpu_ms += span.cpu_ms
+        total.subprocesses += span.subprocesses
+        total.subprocess_ms += span.subprocess_ms
+        total.files_read += span.files_read
+        total.bytes_read += span.bytes_read
+        hot_spots[key][1] += 1
+
+    return sorted(hot_spots.values(), key=lambda hot_spot:
+                  hot_spot[0].wall_ms, reverse=True)
+
+
+def print_hot_spots():
+    """Prints the table of the recorded spans, the slowest first"""
+
+    row = "{0:8}{1:14}{2:46}{3:>6}{4:>11}{5:>11}{6:>7}{7:>11}{8:>7}{9:>10}"
+
+    print("\nTimings:\n")
+    if tracemalloc.is_tracing():
+        print("The times include the overhead of tracing the Python "
+              "allocations for the memory accounting\n")
+    print(row.format("Kind", "Plugin", "Name", "Calls", "Wall ms", "CPU ms",
+                     "Procs", "Proc ms", "Files", "Bytes"))
+    for (span, calls) in get_hot_spots():
+        print(row.format(span.kind, span.plugin or "-", span.name[:45], calls,
+                         "%.1f" % span.wall_ms, "%.1f" % span.cpu_ms,
+                         span.subprocesses, "%.1f" % span.subprocess_ms,
+                         span.files_read, span.bytes_read))
@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Export the spans of the run as Chrome trace events, the trace can be
+opened in Perfetto or chrome://tracing"""
+
+
+import os
+import json
+
+from servicereportpkg.global_context import TOOL_NAME, RUN_ID
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.timings import get_spans
+from servicereportpkg.file_manager import write_file_atomic
+
+
+def get_span_event(span, base_time, pid):
+    """Returns the complete event of the span, the times are in
+    microseconds since base_time"""
+
+    args = {"cpu_ms": round(span.cpu_ms, 3)}
+    if span.plugin is not None:
+        args["plugin"] = span.plugin
+    if span.subprocesses:
+        args["subprocesses"] = span.subprocesses
+        args["subprocess_ms"] = round(span.subprocess_ms, 3)
+    if span.files_read:
+        args["files_read"] = span.files_read
+        args["bytes_read"] = span.bytes_read
+    args.update(span.args)
+
+    return {"name": span.name,
+            "cat": span.kind,
+            "ph": "X",
+            "ts": round((span.start_time - base_time) * 1000000, 3),
+            "dur": round(span.wall_ms * 1000, 3),
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": args}
+
+
+def get_trace_events():
+    """Returns the trace events of the recorded spans along with the
+    metadata events naming the process and the threads"""
+
+    spans = get_spans(trace=True)
+    if not spans:
+        return []
+
+    pid = os.getpid()
+    base_time = min(span.start_time for span in spans)
+    events = [{"name": "process_name", "ph": "M", "pid": pid,
+               "args": {"name": TOOL_NAME}}]
+
+    threads = {}
+    for span in spans:
+        threads.setdefault(span.thread_id, span.thread_name)
+    for thread_id, thread_name in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid,
+                       "tid": thread_id, "args": {"name": thread_name}})
+
+    events.extend(sorted((get_span_event(span, base_time, pid)
+                          for span in spans),
+                         key=lambda event: event["ts"]))
+
+    return events
+
+
+def write_trace(trace_file, tool_version=None):
+    """Write the trace of the run to trace_file in the Chrome trace event
+    format.
+
+    Returns:
+    True on success else False"""
+
+    log = get_default_logger()
+
+    trace = {"traceEvents": get_trace_events(),
+             "displayTimeUnit": "ms",
+             "otherData": {"run_id": RUN_ID,
+                           "tool_version": tool_version}}
+
+    if not write_file_atomic(trace_file, json.dumps(trace)):
+        log.warning("Failed to write the trace to %s", trace_file)
+        return False
+
+    log.debug("Trace written to %s", trace_file)
+    return True
@@ -7,15 +7,21 @@
 
 
 import os
+import grp
 import stat
+import time
+import hashlib
 import inspect
 import pkgutil
 import importlib
+import threading
 import subprocess
 from distutils.spawn import find_executable
 
 
 from servicereportpkg.logger import get_default_logger
+from servicereportpkg.timings import account_subprocess, account_file_read
+from servicereportpkg.timings import timed, add_span_args
 
 
 def get_package_classes(pkg_path, prefix):
@@ -100,6 +106,28 @@ def get_system_platform():
     return system_platform
 
 
+_subprocess_count = 0
+_subprocess_lock = threading.Lock()
+
+
+def count_subprocess(duration=0):
+    """Count a process spawned by the tool that ran for duration
+    seconds"""
+
+    global _subprocess_count
+
+    with _subprocess_lock:
+        _subprocess_count += 1
+
+    account_subprocess(duration)
+
+
+def get_subprocess_count():
+    """Returns the number of processes spawned by the tool"""
+
+    return _subprocess_count
+
+
 def is_command_exists(command):
     """Return True if the given command present in the system else False"""
 
@@ -119,14 +147,21 @@ def execute_command(command, sh=False):
             log.debug("%s command not found", command[0])
             return (None, None, None)
 
-        if sh:
-            command = ' '.join(command)
+        with timed("command", os.path.basename(command[0])):
+            add_span_args(argv=command)
+
+            if sh:
+                command = ' '.join(command)
+
+            start_time = time.monotonic()
+            process = subprocess.Popen(command,
+                                       shell=sh,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+            (output, err) = process.communicate()
+            count_subprocess(time.monotonic() - start_time)
+            add_span_args(exit_code=process.returncode)
 
-        process = subprocess.Popen(command,
-                                   shell=sh,
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
-        (output, err) = process.communicate()
         output = output.decode('utf-8')
         return(process.returncode, output, err)
 
@@ -180,6 +215,21 @@ def is_package_installed(package):
     return False
 
 
+def get_package_db_paths():
+    """Returns the list of package database paths of the package manager
+    supported in the current system"""
+
+    package_manager_options = find_package_manager()
+
+    if package_manager_options is None:
+        return None
+
+    if package_manager_options["command"] == "dpkg":
+        return ["/var/lib/dpkg/status"]
+
+    return ["/var/lib/rpm", "/usr/lib/sysimage/rpm"]
+
+
 def get_service_processor():
     """Find and return the service processor type if present else
     empty string"""
@@ -208,6 +258,46 @@ def is_daemon_enabled(daemon):
     return False
 
 
+def is_kernel_module_loaded(module):
+    """Returns True if the given kernel module is loaded or built into the
+    kernel. Reads the module state from /sys/module, /proc/modules is read
+    only if sysfs is not available."""
+
+    module = module.replace("-", "_")
+    module_dir = "/sys/module/" + module
+
+    if os.path.isdir("/sys/module"):
+        if not os.path.isdir(module_dir):
+            return False
+
+        # Built-in modules have no initstate
+        if not os.path.exists(module_dir + "/initstate"):
+            return True
+
+        return get_file_content(module_dir + "/initstate") == "live"
+
+    modules = get_file_content("/proc/modules")
+    if modules is None:
+        return None
+
+    for line in modules.splitlines():
+        if line.split(' ', 1)[0] == module:
+            return True
+
+    return False
+
+
+def is_group_present(group):
+    """Returns True if the given user group is present in the system, the
+    group is looked up through NSS like getent does"""
+
+    try:
+        grp.getgrnam(group)
+        return True
+    except KeyError:
+        return False
+
+
 def get_service_status(service):
     """Checks the service status by issuing the systemctl command"""
 
@@ -227,8 +317,10 @@ def get_file_content(file_path):
     log = get_default_logger()
 
     try:
-        with open(file_path, 'r') as o_file:
+        with timed("file", file_path, trace_only=True), \
+                open(file_path, 'r') as o_file:
             data = o_file.read()
+            account_file_read(len(data))
             return data.strip()
 
     except IOError as io_error:
@@ -290,6 +382,47 @@ def get_total_ram():
     return None
 
 
+def get_hugepage_size():
+    """Returns the default hugepage size in KB, None if hugepages are not
+    supported"""
+
+    log = get_default_logger()
+
+    try:
+        with open('/proc/meminfo') as o_file:
+            for line in o_file.readlines():
+                (key, val) = line.split(':', 1)
+                if key == "Hugepagesize":
+                    return int(val.strip().split(' ', 1)[0])
+    except (IOError, ValueError) as exception:
+        log.debug("Unable to extract the hugepage size from /proc/meminfo, %s",
+                  exception)
+
+    return None
+
+
+def parse_cpu_list(cpu_list):
+    """Returns the set of CPUs in a CPU list like 0-7,16,18-19, None if
+    the list is not valid"""
+
+    cpus = set()
+
+    try:
+        for cpu_range in cpu_list.strip().split(","):
+            if not cpu_range:
+                continue
+
+            if "-" in cpu_range:
+                (first, last) = cpu_range.split("-", 1)
+                cpus.update(range(int(first), int(last) + 1))
+            else:
+                cpus.add(int(cpu_range))
+    except (AttributeError, ValueError):
+        return None
+
+    return cpus
+
+
 def install_package(package):
     """Install the given package."""
 
@@ -301,7 +434,12 @@ def install_package(package):
         return None
 
     command = package_manager["installer"]+" "+package_manager["install_option"]+" "+package
-    return_code = os.system(command)
+    with timed("command", package_manager["installer"]):
+        add_span_args(argv=command)
+        start_time = time.monotonic()
+        return_code = os.system(command)
+        count_subprocess(time.monotonic() - start_time)
+        add_span_args(exit_code=return_code)
 
     if return_code is None:
         return None
@@ -418,3 +556,73 @@ def append_to_file(file_path, s):
     except Exception as e:
         log.debug("Failed to open file: %s, error: %s", file_path, e)
         return False
+
+
+def write_to_file(file_path, s):
+    """Write the given string to the file, mostly used to write sysfs
+    and procfs attributes"""
+
+    log = get_default_logger()
+
+    try:
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(s)
+
+        return True
+    except Exception as e:
+        log.debug("Failed to write file: %s, error: %s", file_path, e)
+        return False
+
+
+def get_path_fingerprint(path):
+    """Returns a string that changes whenever the given path changes.
+    Files under /proc and /sys are fingerprinted by their content since
+    their timestamps carry no meaning, other files by their metadata,
+    directories by the metadata of their entries and symbolic links by
+    their target."""
+
+    def stat_fingerprint(file_stat):
+        return "%o:%d:%d:%d:%d" % (file_stat.st_mode, file_stat.st_uid,
+                                   file_stat.st_gid, file_stat.st_size,
+                                   file_stat.st_mtime_ns)
+
+    try:
+        if os.path.islink(path):
+            return "link:" + os.readlink(path)
+
+        path_stat = os.stat(path)
+
+        if stat.S_ISDIR(path_stat.st_mode):
+            entries = []
+            for entry in os.scandir(path):
+                entries.append(entry.name + "=" +
+                               stat_fingerprint(entry.stat(follow_symlinks=False)))
+            return "dir:" + ",".join(sorted(entries))
+
+        if stat.S_ISREG(path_stat.st_mode) and \
+                path.startswith(("/proc/", "/sys/")):
+            with open(path, "rb") as o_file:
+                data = o_file.read()
+                account_file_read(len(data))
+                return "content:%o:" % path_stat.st_mode + \
+                    hashlib.sha1(data).hexdigest()
+
+        return "stat:" + stat_fingerprint(path_stat)
+
+    except (IOError, OSError):
+        return "missing"
+
+
+def get_inputs_fingerprint(paths):
+    """Returns the fingerprint of the given list of input paths, None if
+    the inputs are unknown"""
+
+    if paths is None:
+        return None
+
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update((path + "\0" + get_path_fingerprint(path) +
+                       "\0").encode("utf-8"))
+
+    return digest.hexdigest()
@@ -10,11 +10,16 @@ the validation scenarios."""
 from collections import OrderedDict
 
 from servicereportpkg.utils import is_string_in_file
+from servicereportpkg.report import Reporter
+from servicereportpkg.results import get_validation_results
 from servicereportpkg.global_context import TOOL_NAME
 from servicereportpkg.logger import get_default_logger
 from servicereportpkg.validate.schemes import SchemeHandler
 from servicereportpkg.validate.plugins import PluginHandler
-from servicereportpkg.logger import change_log_identifier
+from servicereportpkg.logger import log_identifier
+from servicereportpkg.timings import timed
+from servicereportpkg.profiling import profiled
+from servicereportpkg.memory import accounted
 
 
 class Validate(object):
@@ -26,6 +31,53 @@ class Validate(object):
         self.scheme_handler = SchemeHandler()
         self.plugin_handler = PluginHandler(self.scheme_handler)
         self.validation_results = OrderedDict()
+        self.reporter = Reporter(cmd_opts)
+        self.over_budget = []
+        self.aborted = False
+
+    def set_reporter(self, reporter):
+        """Set the reporter notified as the plugins are executed"""
+
+        self.reporter = reporter
+
+    def get_over_budget(self):
+        """Returns the (plugin, memory used, budget) of the plugins that
+        exceeded their memory budget"""
+
+        return self.over_budget
+
+    def is_aborted(self):
+        """Returns True if the validation was aborted since a plugin
+        exceeded its memory budget"""
+
+        return self.aborted
+
+    def get_memory_budget(self, plugin_name):
+        """Returns the memory budget of the plugin in bytes, None if the
+        plugin has no budget"""
+
+        budgets = dict(self.cmd_opts.memory_budget or [])
+        return budgets.get(plugin_name.lower(), budgets.get(None))
+
+    def check_memory_budget(self, plugin_name, usage):
+        """Returns False if the plugin used more memory than its budget,
+        the validation is aborted if requested"""
+
+        budget = self.get_memory_budget(plugin_name)
+        if usage is None or budget is None or usage.get_peak() <= budget:
+            return True
+
+        self.log.warning("%s plugin used %d KB of memory, exceeding its "
+                         "budget of %d KB", plugin_name,
+                         usage.get_peak() / 1024, budget / 1024)
+        self.over_budget.append((plugin_name, usage.get_peak(), budget))
+
+        if self.cmd_opts.memory_budget_abort:
+            self.log.error("Aborting the validation, %s plugin exceeded its "
+                           "memory budget", plugin_name)
+            self.aborted = True
+
+        return False
 
     def get_applicable_plugins(self):
         """Returns a dictionary of applicable plugins"""
@@ -135,24 +187,33 @@ class Validate(object):
             return False
 
     def execute_plugins(self):
-        """Collect all the executable plugins objects, change the journal
-        handler identifier and execute the plugin"""
+        """Collect all the executable plugins objects and execute them
+        with the plugin log identifier"""
 
         successful_plugin_obj = []
         plugin_dir = self.get_executable_plugins()
 
         for plugin in plugin_dir:
-            change_log_identifier(TOOL_NAME + '.' + plugin, self.log)
-
             plugin_objs = plugin_dir[plugin]
 
             # if a plugin fails to execute due an exception then
             # plugin will not be the part of final output
-            for plugin_obj in plugin_objs:
-                self.do_execute_plugin(plugin_obj)
-                successful_plugin_obj.append(plugin_obj)
+            plugin_name = plugin_objs[0].get_name()
+            self.reporter.plugin_started(plugin_name, plugin_objs)
+            with log_identifier(TOOL_NAME + '.' + plugin, plugin=plugin), \
+                    profiled("validate", plugin_name), \
+                    accounted(plugin_name) as usage, \
+                    timed("plugin", plugin_name, plugin_name):
+                for plugin_obj in plugin_objs:
+                    self.do_execute_plugin(plugin_obj)
+                    successful_plugin_obj.append(plugin_obj)
+            with timed("phase", "report rendering"):
+                self.reporter.plugin_completed(plugin_name, plugin_objs)
+
+            self.check_memory_budget(plugin_name, usage)
+            if self.aborted:
+                break
 
-        change_log_identifier(TOOL_NAME, self.log)
         for plugin_obj in successful_plugin_obj:
             if plugin_obj.get_name() not in self.validation_results.keys():
                 self.validation_results[plugin_obj.get_name()] = []
@@ -172,3 +233,35 @@ class Validate(object):
 
         self.execute_plugins()
         return self.validation_results
+
+    def revalidate_results(self, results):
+        """Creates the validation results from the results saved by an
+        earlier run and validates again only the checks whose inputs
+        have changed since then"""
+
+        plugin_classes = {}
+        for plugin in self.plugin_handler.get_applicable_plugins():
+            plugin_classes[plugin.__name__] = plugin
+
+        self.validation_results = get_validation_results(results,
+                                                         plugin_classes)
+
+        for plugin in self.validation_results:
+            self.reporter.plugin_started(plugin,
+                                         self.validation_results[plugin])
+            with log_identifier(TOOL_NAME + '.' + plugin.lower(),
+                                plugin=plugin), \
+                    profiled("validate", plugin), \
+                    accounted(plugin) as usage, \
+                    timed("plugin", plugin, plugin):
+                for plugin_obj in self.validation_results[plugin]:
+                    plugin_obj.revalidate_changed_checks()
+            with timed("phase", "report rendering"):
+                self.reporter.plugin_completed(plugin,
+                                               self.validation_results[plugin])
+
+            self.check_memory_budget(plugin, usage)
+            if self.aborted:
+                break
+
+        return self.validation_results
@@ -6,8 +6,13 @@
 """Parent module for all plugins"""
 
 
-from servicereportpkg.logger import get_default_logger
+import time
+
+from servicereportpkg.check import get_status_msg
+from servicereportpkg.logger import get_default_logger, log_context
+from servicereportpkg.timings import timed, add_span_args
 from servicereportpkg.utils import get_package_classes
+from servicereportpkg.utils import get_inputs_fingerprint
 
 
 class Plugin(object):
@@ -54,23 +59,106 @@ class Plugin(object):
 
         return True
 
+    def get_check_inputs(self):
+        """Returns a dictionary that maps the check function name to the
+        list of files, directories and sysfs nodes the check evaluates.
+        Checks not listed depend on state that can not be fingerprinted,
+        e.g. systemd unit state, and are always validated again."""
+
+        return {}
+
+    def get_check_methods(self):
+        """Returns the names of all the check functions of the plugin"""
+
+        return [method for method in dir(self)
+                if method.startswith("check_") and
+                callable(getattr(self, method))]
+
+    def get_check_method(self, check_name):
+        """Returns the name of the check function that creates the check
+        with the given name, the check name is the function doc string"""
+
+        for check_method in self.get_check_methods():
+            if getattr(self, check_method).__doc__ == check_name:
+                return check_method
+
+        return None
+
+    def get_check(self, check_name):
+        """Returns the check of the given name performed by the plugin,
+        None if the check is not performed"""
+
+        for check in self.checks:
+            if check.get_name() == check_name:
+                return check
+
+        return None
+
+    def get_metrics(self):
+        """Returns a list of (name, help, value) of the numeric facts
+        evaluated by the checks of the plugin, e.g. a memory size along
+        with the size it is expected to be"""
+
+        return []
+
+    def get_check_fingerprint(self, check_method):
+        """Returns the current fingerprint of the check function inputs,
+        None if the inputs are unknown"""
+
+        return get_inputs_fingerprint(self.get_check_inputs().get(check_method))
+
+    def refresh_inventory(self):
+        """Collect again the devices the checks of the plugin evaluate,
+        called before the checks are validated again in watch mode.
+        Returns True if check functions were added for new devices."""
+
+        return False
+
+    def log_check_result(self, check):
+        """Log the result of the check, the record carries the status and
+        the duration as structured fields"""
+
+        status = get_status_msg(check.get_status())
+        self.log.info("%s: %s", check.get_name(), status,
+                      extra={"sr_fields": {"check": check.get_name(),
+                                           "status": status,
+                                           "duration_ms":
+                                           check.get_duration()}})
+
+    def execute_check(self, check_method):
+        """Call the check function and return the check along with the
+        fingerprint of the inputs it evaluated and the time it took"""
+
+        check_name = getattr(self, check_method).__doc__
+
+        with timed("check", check_name, self.get_name()), \
+                log_context(check=check_name):
+            fingerprint = self.get_check_fingerprint(check_method)
+            start_time = time.monotonic()
+            check = getattr(self, check_method)()
+            duration = (time.monotonic() - start_time) * 1000
+            if check is not None:
+                add_span_args(status=get_status_msg(check.get_status()))
+
+        if check is not None:
+            check.set_fingerprint(fingerprint)
+            check.set_duration(round(duration, 3))
+            if check.get_name() is not None:
+                self.log_check_result(check)
+
+        return check
+
     def validate(self):
         """Get all the functions that start with check_ from a plugin and
         call them sequentially, then creates an instance of Check class for
         each check function and add it to the checks list"""
 
         plugin_status = True
-        check_methods = [method for method in dir(self)
-                         if method.startswith("check_")]
 
         check = None
-        for check_method in check_methods:
+        for check_method in self.get_check_methods():
             try:
-                check_method_obj = getattr(self, check_method)
-                if not callable(check_method_obj):
-                    continue
-
-                check = check_method_obj()
+                check = self.execute_check(check_method)
             except Exception as exception:
                 self.log.error("Failed to verify %s reason: %s",
                                check_method, exception)
@@ -85,6 +173,68 @@ class Plugin(object):
 
         return plugin_status
 
+    def revalidate_check(self, check_method):
+        """Call the check function again and replace the earlier check
+        of the same name. Returns the new check."""
+
+        check = self.execute_check(check_method)
+
+        if check is None or check.get_name() is None:
+            return check
+
+        for index, old_check in enumerate(self.checks):
+            if old_check.get_name() == check.get_name():
+                self.checks[index] = check
+                break
+        else:
+            self.checks.append(check)
+
+        return check
+
+    def revalidate_changed_checks(self):
+        """Validate again only the checks whose input fingerprint differs
+        from the fingerprint recorded when the check was performed. The
+        checks no more performed, e.g. of a removed spyre card, are dropped
+        and the checks not performed before are validated."""
+
+        checks = []
+        performed = set()
+
+        for check in self.checks:
+            check_method = self.get_check_method(check.get_name())
+            if check_method is None:
+                self.log.info("%s: no more validated, dropped",
+                              check.get_name())
+                continue
+
+            performed.add(check_method)
+            fingerprint = self.get_check_fingerprint(check_method)
+            if fingerprint is not None and \
+                    fingerprint == check.get_fingerprint():
+                self.log.debug("%s: inputs unchanged", check.get_name())
+                checks.append(check)
+                continue
+
+            checks.append(self.try_execute_check(check_method))
+
+        for check_method in self.get_check_methods():
+            if check_method not in performed:
+                checks.append(self.try_execute_check(check_method))
+
+        self.checks = [check for check in checks
+                       if check is not None and check.get_name() is not None]
+
+    def try_execute_check(self, check_method):
+        """Call the check function, returns None if it failed"""
+
+        try:
+            return self.execute_check(check_method)
+        except Exception as exception:
+            self.log.error("Failed to verify %s reason: %s",
+                           check_method, exception)
+
+        return None
+
 
 class PluginHandler(object):
     """Handles the plugins package"""
@@ -92,8 +242,10 @@ class PluginHandler(object):
     def __init__(self, scheme_handler):
         self.log = get_default_logger()
         self.scheme_handler = scheme_handler
-        self.populate_plugins()
-        self.populate_applicable_plugin()
+        with timed("phase", "plugin discovery"):
+            self.populate_plugins()
+        with timed("phase", "scheme evaluation"):
+            self.populate_applicable_plugin()
 
     def get_plugins(self):
         """Returns a list of all the plugins present in plugins package"""
@@ -18,6 +18,7 @@ from servicereportpkg.utils import get_file_content
 from servicereportpkg.utils import is_string_in_file
 from servicereportpkg.validate.plugins import Plugin
 from servicereportpkg.utils import is_package_installed
+from servicereportpkg.utils import get_package_db_paths
 from servicereportpkg.logger import get_default_logger
 from servicereportpkg.validate.plugins.kdump import Dump
 from servicereportpkg.validate.schemes.schemes import PowerPCScheme
@@ -49,6 +50,18 @@ class FADump(Dump):
                                    (67108864, 131072),
                                    (sys.maxsize, 184320)]
 
+    def get_check_inputs(self):
+        """Returns the inputs of the FADump checks"""
+
+        check_inputs = Dump.get_check_inputs(self)
+        check_inputs.update(
+            {"check_fadump_enabled": ["/sys/kernel/fadump_enabled"],
+             "check_fadump_registered": ["/sys/kernel/fadump_registered"],
+             "check_mem_reservation": ["/sys/kernel/fadump_mem_reserved",
+                                       "/sys/kernel/debug/powerpc/fadump_region"]})
+
+        return check_inputs
+
     @classmethod
     def is_applicable(cls):
         """Returns true if boot cmdline contain fadump=on"""
@@ -207,6 +220,28 @@ class FADump(Dump):
 
         return mem_reserve_check
 
+    def get_metrics(self):
+        """Returns the memory reserved for FADump along with the memory it
+        needs"""
+
+        metrics = []
+        mem_reserve_check = self.get_check(self.check_mem_reservation.__doc__)
+        if mem_reserve_check is None:
+            return metrics
+
+        if mem_reserve_check.get_sysfs_value_found() is not None:
+            metrics.append(("fadump_reserved_bytes",
+                            "Memory reserved for FADump",
+                            mem_reserve_check.get_sysfs_value_found() *
+                            1024 * 1024))
+        if mem_reserve_check.get_sysfs_expected_value() is not None:
+            metrics.append(("fadump_required_bytes",
+                            "Memory FADump needs to be reserved",
+                            mem_reserve_check.get_sysfs_expected_value() *
+                            1024 * 1024))
+
+        return metrics
+
 
 class FADumpFedora(FADump, Plugin, FedoraScheme):
     """Validates the FADump on Fedora"""
@@ -237,6 +272,15 @@ class FADumpSuSE(FADump, Plugin, SuSEScheme, PowerPCScheme):
         self.initial_ramdisk = "/boot/initrd-" \
                                + self.kernel_release
 
+    def get_check_inputs(self):
+        """Returns the inputs of the FADump checks on SuSE"""
+
+        check_inputs = FADump.get_check_inputs(self)
+        check_inputs["check_kdump_sysconfig"] = ["/etc/sysconfig/kdump"]
+        check_inputs["check_kdump_package"] = get_package_db_paths()
+
+        return check_inputs
+
     def check_kdump_sysconfig(self):
         """Fadump attributes in /etc/sysconfig/kdump"""
 
@@ -26,6 +26,11 @@ class HTX(Plugin, PowerPCScheme):
         self.service_name = "htx.d"
         self.installation_path = "/var/log/htx_install_path"
 
+    def get_check_inputs(self):
+        """Returns the inputs of the HTX checks"""
+
+        return {"check_htx_installation_path": [self.installation_path]}
+
     def check_htx_installation_path(self):
         """HTX Installation path"""
 
@@ -9,13 +9,17 @@
 
 import os
 import sys
+import time
 import platform
 import subprocess
 
 from servicereportpkg.utils import is_package_installed
+from servicereportpkg.utils import get_package_db_paths
 from servicereportpkg.validate.plugins import Plugin
 from servicereportpkg.logger import get_default_logger
 from servicereportpkg.utils import get_file_content, get_total_ram
+from servicereportpkg.utils import count_subprocess
+from servicereportpkg.timings import timed, add_span_args
 from servicereportpkg.utils import get_file_size, is_string_in_file
 from servicereportpkg.check import PackageCheck, ServiceCheck, Check
 from servicereportpkg.check import SysfsCheck, ConfigurationFileCheck
@@ -36,6 +40,13 @@ class Dump(object):
         self.kernel_release = platform.release()
         self.active_dump = "/proc/vmcore"
 
+    def get_check_inputs(self):
+        """Returns the inputs of the generic dump checks"""
+
+        return {"check_dump_component_in_initrd": [self.initial_ramdisk],
+                "check_kexec_package": get_package_db_paths(),
+                "check_active_dump": [self.active_dump]}
+
     def check_is_dump_service_active(self):
         """Service status"""
 
@@ -137,6 +148,19 @@ class Kdump(Dump):
                                    (16777216, 32768),
                                    (sys.maxsize, 65536)]
 
+    def get_check_inputs(self):
+        """Returns the inputs of the kdump checks"""
+
+        check_inputs = Dump.get_check_inputs(self)
+        check_inputs.update(
+            {"check_capture_kernel_memory_allocation":
+                 ["/sys/kernel/kexec_crash_size"],
+             "check_is_kexec_crash_loaded": ["/sys/kernel/kexec_crash_loaded"],
+             "check_kdump_sysconfig": [self.kdump_conf_file],
+             "check_kdump_etc_config": [self.kdump_etc_conf]})
+
+        return check_inputs
+
     @classmethod
     def is_applicable(cls):
         """Returns true if boot cmdline doesn't contain fadump=on"""
@@ -214,6 +238,27 @@ class Kdump(Dump):
 
         return kdump_mem
 
+    def get_metrics(self):
+        """Returns the memory allocated for the capture kernel along with
+        the memory it needs"""
+
+        metrics = []
+        kdump_mem = self.get_check(
+            self.check_capture_kernel_memory_allocation.__doc__)
+        if kdump_mem is None:
+            return metrics
+
+        if kdump_mem.get_sysfs_value_found() is not None:
+            metrics.append(("kdump_crash_size_bytes",
+                            "Memory allocated for the capture kernel",
+                            kdump_mem.get_sysfs_value_found() * 1024 * 1024))
+        if kdump_mem.get_sysfs_expected_value() is not None:
+            metrics.append(("kdump_crash_size_required_bytes",
+                            "Memory needed by the capture kernel",
+                            kdump_mem.get_sysfs_expected_value() * 1024 * 1024))
+
+        return metrics
+
     def check_is_kexec_crash_loaded(self):
         """Capture kernel load status"""
 
@@ -391,10 +436,15 @@ def get_crashkernel_recomm():
 
     # check if we can get crashkernel recommandation from kdump-lib.sh
     try:
-        proc = subprocess.Popen(crash_value_cmd, stdout=subprocess.PIPE,
-                                stdin=subprocess.PIPE,
-                                stderr=subprocess.PIPE)
-        crash_value = proc.stdout.read().decode('ascii')[:-1]
+        with timed("command", crash_value_cmd[0]):
+            add_span_args(argv=crash_value_cmd)
+            start_time = time.monotonic()
+            proc = subprocess.Popen(crash_value_cmd, stdout=subprocess.PIPE,
+                                    stdin=subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
+            crash_value = proc.stdout.read().decode('ascii')[:-1]
+            add_span_args(exit_code=proc.wait())
+            count_subprocess(time.monotonic() - start_time)
         # expecting crashkernel value in xx[M|MB|G|GB|T|TB] format
         if len(crash_value) > 1:
             unit = ""
@@ -503,6 +553,16 @@ class KdumpSuSE(Kdump, Plugin, SuSEScheme):
                                    (16777216, 32768),
                                    (sys.maxsize, 65536)]
 
+    def get_check_inputs(self):
+        """Returns the inputs of the kdump checks on SuSE"""
+
+        check_inputs = Kdump.get_check_inputs(self)
+        check_inputs["check_dump_component_in_initrd"] = \
+            self.initial_ramdisk_list
+        check_inputs["check_kdump_package"] = get_package_db_paths()
+
+        return check_inputs
+
     def check_dump_component_in_initrd(self):
         """Dump component in initial ramdisk"""
 
@@ -8,6 +8,7 @@
 
 from servicereportpkg.check import PackageCheck
 from servicereportpkg.utils import is_package_installed
+from servicereportpkg.utils import get_package_db_paths
 from servicereportpkg.validate.plugins import Plugin
 from servicereportpkg.validate.schemes.schemes import FedoraScheme, RHELScheme
 from servicereportpkg.validate.schemes.schemes import UbuntuScheme, SuSEScheme
@@ -45,6 +46,13 @@ class Package():
             setattr(self, "check_%s" % package,
                     generate_package_check(self, package))
 
+    def get_check_inputs(self):
+        """All the package checks evaluate the package database"""
+
+        package_db_paths = get_package_db_paths()
+        return dict(("check_%s" % package, package_db_paths)
+                    for package in self.packages)
+
 
 class RHELPackage(Package, Plugin, RHELScheme):
     """Evaluates the packages on RHEL"""
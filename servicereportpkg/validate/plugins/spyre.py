@@ -8,15 +8,388 @@
 import os
 import re
 import stat
-import pyudev
-
-from servicereportpkg.utils import execute_command
+from collections import OrderedDict
+
+from servicereportpkg.utils import is_group_present
+from servicereportpkg.utils import get_file_content
+from servicereportpkg.utils import get_total_ram, get_hugepage_size
+from servicereportpkg.utils import is_kernel_module_loaded
+from servicereportpkg.logger import get_default_logger
+from servicereportpkg.timings import account_file_read
 from servicereportpkg.check import Check, ConfigCheck
 from servicereportpkg.validate.schemes import Scheme
 from servicereportpkg.validate.plugins import Plugin
-from servicereportpkg.check import FilesCheck
+from servicereportpkg.check import FilesCheck, DeviceCheck
 from servicereportpkg.check import ConfigurationFileCheck
-from servicereportpkg.utils import is_read_write_to_all_users
+from servicereportpkg.config_rules import ConfigFile, LineRule
+from servicereportpkg.config_rules import LimitsRule, ModprobeOptionRule
+
+
+PCI_DEVICES_DIR = "/sys/bus/pci/devices"
+VFIO_DEV_DIR = "/dev/vfio"
+VFIO_DRIVER = "vfio-pci"
+# IBM vendor ID
+SPYRE_VENDOR_IDS = ["0x1014"]
+# Spyre device IDs
+SPYRE_DEVICE_IDS = ["0x06a7", "0x06a8"]
+# Default DMA window pinned for each card in KB, the window depends on
+# the workload, --spyre-dma-window sets it
+SPYRE_DMA_WINDOW_KB = 16 * 1024 * 1024
+# Default share of the RAM the sentient group may pin at most, a policy
+# of the tool, --spyre-memlock-share sets it
+SPYRE_MEMLOCK_RAM_SHARE = 0.5
+NR_HUGEPAGES = "/proc/sys/vm/nr_hugepages"
+NODE_DIR = "/sys/devices/system/node"
+
+# Sizes of the cards, set from the command line. No hugepages are needed
+# unless --spyre-hugepages gives the hugepages of each card.
+_dma_window_kb = SPYRE_DMA_WINDOW_KB
+_memlock_ram_share = SPYRE_MEMLOCK_RAM_SHARE
+_hugepages_kb = 0
+
+
+def set_spyre_sizing(dma_window_kb, memlock_ram_share, hugepages_kb):
+    """Set the DMA window and the hugepages of each card in KB and the
+    share of the RAM the sentient group may pin"""
+
+    global _dma_window_kb, _memlock_ram_share, _hugepages_kb
+
+    _dma_window_kb = dma_window_kb
+    _memlock_ram_share = memlock_ram_share
+    _hugepages_kb = hugepages_kb
+
+
+def read_pci_id(device_path, attribute):
+    """Returns the vendor or device id stored in the given attribute of
+    the PCI device, None if it is not readable"""
+
+    try:
+        with open(device_path + "/" + attribute, "r") as o_file:
+            data = o_file.read()
+            account_file_read(len(data))
+            return data.strip()
+    except (IOError, OSError):
+        return None
+
+
+def is_spyre_device(device_path):
+    """Returns True if the PCI device at the given sysfs path is a spyre
+    card. The device id is read only for the devices of spyre vendor."""
+
+    if read_pci_id(device_path, "vendor") not in SPYRE_VENDOR_IDS:
+        return False
+
+    return read_pci_id(device_path, "device") in SPYRE_DEVICE_IDS
+
+
+def is_spyre_card_exists_udev():
+    """Find the spyre card using udev, pyudev is imported only if the
+    sysfs PCI device directory is not available"""
+
+    log = get_default_logger()
+
+    try:
+        import pyudev
+    except ImportError as import_error:
+        log.debug("Unable to scan PCI devices, error: %s", import_error)
+        return False
+
+    context = pyudev.Context()
+
+    for device in context.list_devices(subsystem='pci'):
+        vendor_id = device.attributes.get("vendor").decode("utf-8").strip()
+        if vendor_id not in SPYRE_VENDOR_IDS:
+            continue
+
+        device_id = device.attributes.get("device").decode("utf-8").strip()
+        if device_id not in SPYRE_DEVICE_IDS:
+            continue
+
+        return True
+
+    return False
+
+
+class SpyreCard(object):
+    """Inventory of a spyre card collected from sysfs"""
+
+    def __init__(self, pci_address):
+        self.pci_address = pci_address
+        self.device_id = None
+        self.driver = None
+        self.iommu_group = None
+        self.vfio_device = None
+        self.vfio_mode = None
+        self.numa_node = None
+        self.local_cpulist = None
+        self.msi_irqs = []
+        self.reset_method = None
+        self.resettable = False
+
+    def get_sysfs_path(self):
+        """Returns the sysfs directory of the card"""
+
+        return PCI_DEVICES_DIR + "/" + self.pci_address
+
+
+def read_device_attribute(device_path, attribute):
+    """Returns the content of the sysfs attribute of a device, None if it
+    is not readable"""
+
+    try:
+        with open(device_path + "/" + attribute, "r") as o_file:
+            data = o_file.read()
+            account_file_read(len(data))
+            return data.strip()
+    except (IOError, OSError):
+        return None
+
+
+def get_link_name(entry):
+    """Returns the base name of the symbolic link target"""
+
+    try:
+        return os.path.basename(os.readlink(entry.path))
+    except OSError:
+        return None
+
+
+def scan_vfio_devices():
+    """Returns a dictionary of /dev/vfio character devices and their mode,
+    collected with a single directory scan"""
+
+    vfio_devices = {}
+
+    try:
+        with os.scandir(VFIO_DEV_DIR) as entries:
+            for entry in entries:
+                mode = entry.stat(follow_symlinks=False).st_mode
+                if stat.S_ISCHR(mode):
+                    vfio_devices[entry.name] = mode
+    except OSError:
+        pass
+
+    return vfio_devices
+
+
+def scan_spyre_card(device_path, card, vfio_devices):
+    """Fill the card inventory with a single scan of its sysfs directory"""
+
+    with os.scandir(device_path) as entries:
+        for entry in entries:
+            if entry.name == "driver":
+                card.driver = get_link_name(entry)
+            elif entry.name == "iommu_group":
+                card.iommu_group = get_link_name(entry)
+            elif entry.name == "numa_node":
+                numa_node = read_device_attribute(device_path, "numa_node")
+                if numa_node is not None and int(numa_node) >= 0:
+                    card.numa_node = int(numa_node)
+            elif entry.name == "local_cpulist":
+                card.local_cpulist = read_device_attribute(device_path,
+                                                           "local_cpulist")
+            elif entry.name == "msi_irqs":
+                try:
+                    card.msi_irqs = sorted(int(irq) for irq in
+                                           os.listdir(entry.path)
+                                           if irq.isdigit())
+                except OSError:
+                    pass
+            elif entry.name == "reset":
+                card.resettable = True
+            elif entry.name == "reset_method":
+                card.reset_method = read_device_attribute(device_path,
+                                                          "reset_method")
+
+    if card.iommu_group is not None:
+        card.vfio_device = VFIO_DEV_DIR + "/" + card.iommu_group
+        card.vfio_mode = vfio_devices.get(card.iommu_group)
+
+
+_spyre_cards = None
+
+
+def get_spyre_cards(refresh=False):
+    """Returns an ordered dictionary of the spyre cards keyed by the PCI
+    address. The inventory is collected with one scan of the PCI device
+    directory, /dev/vfio and each card directory, and kept until it is
+    collected again with refresh, e.g. when the spyre plugins are created
+    for a new validation or after a repair."""
+
+    global _spyre_cards
+
+    if _spyre_cards is not None and not refresh:
+        return _spyre_cards
+
+    cards = OrderedDict()
+    vfio_devices = scan_vfio_devices()
+
+    try:
+        with os.scandir(PCI_DEVICES_DIR) as devices:
+            for device in sorted(devices, key=lambda device: device.name):
+                if not is_spyre_device(device.path):
+                    continue
+
+                card = SpyreCard(device.name)
+                card.device_id = read_pci_id(device.path, "device")
+                scan_spyre_card(device.path, card, vfio_devices)
+                cards[device.name] = card
+    except OSError as os_error:
+        get_default_logger().debug("Unable to scan %s, error: %s",
+                                   PCI_DEVICES_DIR, os_error)
+
+    _spyre_cards = cards
+    return _spyre_cards
+
+
+def generate_card_check(self, pci_address):
+    """Generates a function that checks the given spyre card is bound to
+    the vfio driver and is accessible through its vfio group device"""
+
+    def check():
+        card = get_spyre_cards().get(pci_address)
+        card_check = DeviceCheck(check.__doc__, pci_address)
+
+        if card is None:
+            self.log.error("Spyre card %s not found", pci_address)
+            card_check.set_status(False)
+            return card_check
+
+        driver_status = card.driver == VFIO_DRIVER
+        if not driver_status:
+            self.log.error("Spyre card %s is bound to %s driver",
+                           pci_address, card.driver)
+        card_check.add_attribute("driver", driver_status, card.driver,
+                                 VFIO_DRIVER)
+
+        group_status = card.iommu_group is not None
+        if not group_status:
+            self.log.error("Spyre card %s is not in an IOMMU group",
+                           pci_address)
+        card_check.add_attribute("iommu_group", group_status,
+                                 card.iommu_group, None)
+
+        vfio_status = card.vfio_mode is not None and \
+            card.vfio_mode & 0o666 == 0o666
+        vfio_mode = None
+        if card.vfio_mode is not None:
+            vfio_mode = "%04o" % stat.S_IMODE(card.vfio_mode)
+        if not vfio_status:
+            self.log.error("Spyre card %s vfio device %s is not accessible",
+                           pci_address, card.vfio_device)
+        card_check.add_attribute("vfio_device", vfio_status, vfio_mode,
+                                 "0666")
+
+        card_check.add_attribute("numa_node", True, card.numa_node, None)
+        card_check.add_attribute("reset_method", True,
+                                 card.reset_method if card.resettable
+                                 else None, None)
+
+        card_check.set_status(driver_status and group_status and vfio_status)
+        return card_check
+
+    check.__doc__ = "Spyre card %s" % pci_address
+    return check
+
+
+def get_memlock_limit(card_count):
+    """Returns the memlock limit in KB needed to pin the DMA windows of
+    the given number of cards"""
+
+    return card_count * _dma_window_kb
+
+
+def get_memlock_ceiling():
+    """Returns the largest memlock limit in KB allowed for the sentient
+    group, a share of the system RAM, None if the RAM size is unknown"""
+
+    total_ram = get_total_ram()
+    if total_ram is None:
+        return None
+
+    return int(total_ram * _memlock_ram_share)
+
+
+def is_memlock_limit_allowed(memlock_limit):
+    """Returns True if the memlock limit does not exceed the share of the
+    system RAM the sentient group may pin"""
+
+    memlock_ceiling = get_memlock_ceiling()
+    return memlock_ceiling is None or memlock_limit <= memlock_ceiling
+
+
+def generate_memlock_validator(memlock_limit):
+    """Generates a function that accepts the memlock limits large enough
+    for the cards but not larger than the share of the system RAM the
+    sentient group may pin. No limit is accepted if the cards need more
+    than that share."""
+
+    memlock_ceiling = get_memlock_ceiling()
+
+    def is_valid(value):
+        try:
+            value = int(value)
+        except ValueError:
+            # unlimited lets the group pin all of the memory
+            return False
+
+        if memlock_ceiling is not None and value > memlock_ceiling:
+            return False
+
+        return value >= memlock_limit
+
+    return is_valid
+
+
+def get_node_hugepages_path(node, hugepage_size):
+    """Returns the hugepage pool attribute of the NUMA node"""
+
+    return "%s/node%d/hugepages/hugepages-%dkB/nr_hugepages" % \
+        (NODE_DIR, node, hugepage_size)
+
+
+def get_hugepage_requirement(cards, hugepage_size):
+    """Returns the number of hugepages needed by the cards in total and an
+    ordered dictionary of the hugepages needed on each NUMA node"""
+
+    card_hugepages = -(-_hugepages_kb // hugepage_size)
+    node_hugepages = OrderedDict()
+
+    for card in cards.values():
+        if card.numa_node is not None:
+            node_hugepages[card.numa_node] = \
+                node_hugepages.get(card.numa_node, 0) + card_hugepages
+
+    return (card_hugepages * len(cards), node_hugepages)
+
+
+def get_config_files(memlock_limit):
+    """Returns the configuration files of the spyre checks keyed by the
+    check method"""
+
+    return {"check_driver_config":
+            ConfigFile("/etc/modprobe.d/vfio-pci.conf",
+                       [ModprobeOptionRule("vfio-pci", "ids",
+                                           "1014:06a7,1014:06a8"),
+                        ModprobeOptionRule("vfio-pci", "disable_idle_d3",
+                                           "yes")]),
+            "check_udev_rule":
+            ConfigFile("/etc/udev/rules.d/95-vfio-3.rules",
+                       [LineRule("SUBSYSTEM==\"vfio\", MODE=\"0666\"")]),
+            "check_memlock_conf":
+            ConfigFile("/etc/security/limits.d/memlock.conf",
+                       [LimitsRule("@sentient", "-", "memlock", memlock_limit,
+                                   generate_memlock_validator(memlock_limit))]),
+            "check_vfio_pci_conf":
+            ConfigFile("/etc/modules-load.d/vfio-pci.conf",
+                       [LineRule("vfio-pci"),
+                        LineRule("vfio_iommu_spapr_tce")])}
+
+
+def get_card_check_method(pci_address):
+    """Returns the name of the check function of the spyre card"""
+
+    return "check_card_" + re.sub(r"[^0-9a-zA-Z]", "_", pci_address)
 
 
 class Spyre(Plugin, Scheme):
@@ -26,27 +399,69 @@ class Spyre(Plugin, Scheme):
         Plugin.__init__(self)
         self.name = Spyre.__name__
         self.description = Spyre.__doc__
+        self.refresh_inventory()
+
+    def refresh_inventory(self):
+        """Scan the spyre cards again, along with the limits depending on
+        their count, and add the checks of the new cards. A long running
+        process, e.g. the service, validates the cards present at the
+        time of the validation. Returns True if checks were added."""
+
+        added = False
+        for pci_address in get_spyre_cards(refresh=True):
+            check_method = get_card_check_method(pci_address)
+            if not hasattr(self, check_method):
+                setattr(self, check_method,
+                        generate_card_check(self, pci_address))
+                added = True
+
+        # Without the sysfs inventory size the limits for a single card
+        self.memlock_limit = get_memlock_limit(max(len(get_spyre_cards()),
+                                                   1))
+        self.config_files = get_config_files(self.memlock_limit)
+
+        return added
+
+    def get_check_inputs(self):
+        """Returns the inputs of the spyre checks"""
+
+        check_inputs = \
+            {"check_user_group": ["/etc/group"],
+             "check_vfio_module": ["/sys/module/vfio_pci"],
+             "check_vfio_access_permission": [VFIO_DEV_DIR]}
+
+        for check_method, config_file in self.config_files.items():
+            check_inputs[check_method] = [config_file.get_file_path()]
+
+        # The memlock limit and the hugepage pool depend on the cards
+        check_inputs["check_memlock_conf"].append(PCI_DEVICES_DIR)
+        check_inputs["check_hugepage_pool"] = [NR_HUGEPAGES, PCI_DEVICES_DIR]
+        hugepage_size = get_hugepage_size()
+        if hugepage_size is not None:
+            (_total, node_hugepages) = \
+                get_hugepage_requirement(get_spyre_cards(), hugepage_size)
+            for node in node_hugepages:
+                check_inputs["check_hugepage_pool"].append(
+                    get_node_hugepages_path(node, hugepage_size))
+
+        for pci_address, card in get_spyre_cards().items():
+            check_inputs[get_card_check_method(pci_address)] = \
+                [card.get_sysfs_path() + "/driver", VFIO_DEV_DIR]
+
+        return check_inputs
 
     @classmethod
     def is_spyre_card_exists(cls):
-        """Return True if spyre exists in the system otherwise False"""
-
-        context = pyudev.Context()
-        # IBM vendor ID
-        spyre_vendor_ids = ["0x1014"]
-        # Spyre device IDs
-        spyre_device_ids = ["0x06a7", "0x06a8"]
-
-        for device in context.list_devices(subsystem='pci'):
-            vendor_id = device.attributes.get("vendor").decode("utf-8").strip()
-            if vendor_id not in spyre_vendor_ids:
-                continue
+        """Return True if spyre exists in the system otherwise False. Scans
+        the sysfs PCI devices and stops at the first spyre card."""
 
-            device_id = device.attributes.get("device").decode("utf-8").strip()
-            if device_id not in spyre_device_ids:
-                continue
+        if not os.path.isdir(PCI_DEVICES_DIR):
+            return is_spyre_card_exists_udev()
 
-            return True
+        with os.scandir(PCI_DEVICES_DIR) as devices:
+            for device in devices:
+                if is_spyre_device(device.path):
+                    return True
 
         return False
 
@@ -56,134 +471,116 @@ class Spyre(Plugin, Scheme):
 
         return Spyre.is_spyre_card_exists()
 
-    def check_driver_config(self):
-        """VFIO Driver configuration"""
+    def get_metrics(self):
+        """Returns the number of spyre cards and the number of cards bound
+        to the vfio-pci driver"""
 
-        vfio_config_file = "/etc/modprobe.d/vfio-pci.conf"
+        cards = get_spyre_cards()
+        return [("spyre_cards", "Number of spyre cards", len(cards)),
+                ("spyre_cards_vfio", "Number of spyre cards bound to vfio-pci",
+                 len([card for card in cards.values()
+                      if card.driver == VFIO_DRIVER]))]
 
-        vfio_config = {("vfio-pci", "ids"): "1014:06a7,1014:06a8",
-                       ("vfio-pci", "disable_idle_d3"): "yes",
-                       }
-        conf_check = ConfigurationFileCheck(self.check_driver_config.__doc__,
-                                            vfio_config_file)
+    def get_config_file(self, check_method):
+        """Returns the configuration file checked by the given check
+        method"""
 
-        status = True
-        try:
-            with open(vfio_config_file, "r", encoding="utf-8") as file:
-                for line in file:
-                    line = line.strip()
-                    match = re.match(r"^options\s+(\S+)\s+(.+)$", line)
-                    if not match:
-                        continue
-
-                    mod = match.group(1)
-                    configs = match.group(2).strip()
-                    matches = re.findall(r'(\w+)=([^=\s]+)', configs)
-                    for key, value in matches:
-                        if (mod, key) not in vfio_config:
-                            continue
-
-                        if vfio_config[(mod, key)] == value:
-                            conf_check.add_attribute((mod, key),
-                                                     True, value, None)
-                            vfio_config.pop((mod, key))
-        except FileNotFoundError:
-            self.log.error("File not found : %s", vfio_config_file)
-
-        for config in vfio_config.items():
-            conf_check.add_attribute(config[0], False, None, config[1])
-
-        if vfio_config:
-            status = False
-
-        conf_check.set_status(status)
+        return self.config_files[check_method]
+
+    def evaluate_config_file(self, check_method):
+        """Evaluate the rules of the configuration file checked by the
+        given check method"""
+
+        config_file = self.config_files[check_method.__name__]
+        conf_check = ConfigurationFileCheck(check_method.__doc__,
+                                            config_file.get_file_path())
+        config_file.update_check(conf_check)
 
         return conf_check
 
+    def check_driver_config(self):
+        """VFIO Driver configuration"""
+
+        return self.evaluate_config_file(self.check_driver_config)
+
     def check_udev_rule(self):
         """VFIO udev rules configuration"""
 
-        vfio_udev = "SUBSYSTEM==\"vfio\", MODE=\"0666\""
-        config_file = "/etc/udev/rules.d/95-vfio-3.rules"
+        return self.evaluate_config_file(self.check_udev_rule)
 
-        conf_check = ConfigurationFileCheck(self.check_udev_rule.__doc__,
-                                            config_file)
+    def is_memlock_limit_allowed(self):
+        """Returns True if the memlock limit needed by the cards does not
+        exceed the share of the system RAM the sentient group may pin"""
 
-        status = False
-        try:
-            with open(config_file, "r", encoding="utf-8") as file:
-                for line in file:
-                    line = line.strip()
-                    if line == vfio_udev:
-                        status = True
-                        break
-        except FileNotFoundError:
-            self.log.error("File not found : %s", config_file)
-
-        conf_check.add_attribute(vfio_udev, status, None, None)
-        conf_check.set_status(status)
-        return conf_check
+        return is_memlock_limit_allowed(self.memlock_limit)
 
     def check_memlock_conf(self):
         """User memlock configuration"""
 
-        vfio_mem_conf = ["@sentient - memlock 134217728"]
-        config_file = "/etc/security/limits.d/memlock.conf"
-
-        conf_check = ConfigurationFileCheck(self.check_memlock_conf.__doc__,
-                                            config_file)
+        conf_check = self.evaluate_config_file(self.check_memlock_conf)
 
-        status = True
-        try:
-            with open(config_file, "r", encoding="utf-8") as file:
-                for line in file:
-                    line = line.strip()
-                    if line in vfio_mem_conf:
-                        conf_check.add_attribute(line, True, None, None)
-                        vfio_mem_conf.remove(line)
-
-        except FileNotFoundError:
-            self.log.error("File not found : %s", config_file)
-            status = False
-
-        if vfio_mem_conf:
-            status = False
-            for conf in vfio_mem_conf:
-                conf_check.add_attribute(conf, False, None, None)
-
-        conf_check.set_status(status)
+        if not self.is_memlock_limit_allowed():
+            self.log.error("The spyre cards need a memlock limit of %d KB, "
+                           "more than %d%% of the system RAM",
+                           self.memlock_limit, _memlock_ram_share * 100)
+            conf_check.set_message(
+                "\nThe spyre cards need to pin %d KB of memory, more than "
+                "%d%% of the system RAM.\nAdd memory to the system or "
+                "remove cards from it.\n" % (self.memlock_limit,
+                                              _memlock_ram_share * 100))
 
         return conf_check
 
     def check_vfio_pci_conf(self):
         """VFIO module dep configuration"""
 
-        vfio_mod_conf = ["vfio-pci",
-                         "vfio_iommu_spapr_tce"]
-        config_file = "/etc/modules-load.d/vfio-pci.conf"
-
-        conf_check = ConfigurationFileCheck(self.check_vfio_pci_conf.__doc__,
-                                            config_file)
-
-        status = True
-        try:
-            with open(config_file, "r", encoding="utf-8") as file:
-                for line in file:
-                    line = line.strip()
-                    if line in vfio_mod_conf:
-                        conf_check.add_attribute(line, True, None, None)
-                        vfio_mod_conf.remove(line)
-        except FileNotFoundError:
-            self.log.error("File not found : %s", config_file)
-            status = False
-
-        if vfio_mod_conf:
-            for conf in vfio_mod_conf:
-                conf_check.add_attribute(conf, False, None, None)
-
-        conf_check.set_status(status)
-
-        return conf_check
+        return self.evaluate_config_file(self.check_vfio_pci_conf)
+
+    def check_hugepage_pool(self):
+        """Hugepage pool"""
+
+        # The hugepages are a recommendation, the check does not fail and
+        # the pool is not grown by the repair
+        pool_check = ConfigurationFileCheck(self.check_hugepage_pool.__doc__,
+                                            NR_HUGEPAGES)
+        pool_check.set_status(True)
+
+        if not _hugepages_kb:
+            self.log.debug("No hugepages needed by the spyre cards")
+            return pool_check
+
+        hugepage_size = get_hugepage_size()
+        if hugepage_size is None:
+            self.log.warning("Hugepages are not supported")
+            return pool_check
+
+        (nr_hugepages, node_hugepages) = \
+            get_hugepage_requirement(get_spyre_cards(), hugepage_size)
+
+        pools = [(NR_HUGEPAGES, nr_hugepages)]
+        for node, hugepages in node_hugepages.items():
+            pools.append((get_node_hugepages_path(node, hugepage_size),
+                          hugepages))
+
+        shortfall = False
+        for (pool, hugepages) in pools:
+            value = get_file_content(pool)
+            if value is not None and value.isdigit():
+                value = int(value)
+            pool_status = isinstance(value, int) and value >= hugepages
+            if not pool_status:
+                self.log.warning("%s: %s hugepages of %dkB, %d needed",
+                                 pool, value, hugepage_size, hugepages)
+                shortfall = True
+            pool_check.add_attribute(pool, pool_status, value, hugepages)
+
+        if shortfall:
+            self.log.recommendation("Reserve %d hugepages of %dkB, e.g. "
+                                    "vm.nr_hugepages = %d in /etc/sysctl.d",
+                                    nr_hugepages, hugepage_size,
+                                    nr_hugepages)
+
+        return pool_check
 
     def check_user_group(self):
         """User group configuration"""
@@ -192,23 +589,10 @@ class Spyre(Plugin, Scheme):
         user_group_check = ConfigCheck(self.check_user_group.__doc__)
 
         status = True
-        (rc, stdout, _err) = execute_command(["getent", "group"])
-
-        if rc is not None:
-            for line in stdout.splitlines():
-                line = line.strip()
-                match = re.match(r'^([^:]+)', line)
-                if not match:
-                    continue
-
-                user_group = match.group(1)
-                if user_group in user_groups:
-                    user_groups.remove(user_group)
-
-        if user_groups:
-            status = False
-            for user in user_groups:
-                user_group_check.add_config(user, False)
+        for user_group in user_groups:
+            if not is_group_present(user_group):
+                status = False
+                user_group_check.add_config(user_group, False)
 
         user_group_check.set_status(status)
 
@@ -219,46 +603,27 @@ class Spyre(Plugin, Scheme):
 
         module_name = "vfio_pci"
         module_check = Check(self.check_vfio_module.__doc__)
-        (rc, stdout, _err) = execute_command(["lsmod"])
-        status = False
-
-        if rc is None:
-            return module_check
-
-        for line in stdout.splitlines():
-            if not line:
-                continue
+        module_check.set_status(is_kernel_module_loaded(module_name))
 
-            if line.split()[0] == module_name:
-                status = True
-                break
-
-        module_check.set_status(status)
         return module_check
 
     def check_vfio_access_permission(self):
         """VFIO device permission"""
 
-        vfio_dir = "/dev/vfio/"
-
         perm_check = FilesCheck(self.check_vfio_access_permission.__doc__)
         status = True
 
-        if not os.path.isdir(vfio_dir):
-            self.log.error("No %s directory", vfio_dir)
+        if not os.path.isdir(VFIO_DEV_DIR):
+            self.log.error("No %s directory", VFIO_DEV_DIR)
             return perm_check
 
-        for name in os.listdir(vfio_dir):
-            full_path = vfio_dir + name
-            try:
-                mode = os.stat(full_path).st_mode
-                if stat.S_ISCHR(mode):
-                    ret = is_read_write_to_all_users(full_path)
-                    if not ret and status:
-                        status = ret
-                    perm_check.add_file(full_path, ret)
-            except FileNotFoundError:
-                self.log.error("Failed to access %s", full_path)
+        for name, mode in sorted(scan_vfio_devices().items()):
+            ret = mode & 0o666 == 0o666
+            if not ret:
+                self.log.error("%s/%s is not accessible to all users",
+                               VFIO_DEV_DIR, name)
+                status = False
+            perm_check.add_file(VFIO_DEV_DIR + "/" + name, ret)
 
         perm_check.set_status(status)
         return perm_check
@@ -0,0 +1,148 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Plugin to check the NUMA, IOMMU and interrupt locality of spyre cards"""
+
+
+import os
+import re
+
+from servicereportpkg.check import DeviceCheck
+from servicereportpkg.utils import get_file_content, parse_cpu_list
+from servicereportpkg.validate.schemes import Scheme
+from servicereportpkg.validate.plugins import Plugin
+from servicereportpkg.validate.plugins.spyre import Spyre, PCI_DEVICES_DIR
+from servicereportpkg.validate.plugins.spyre import get_spyre_cards
+from servicereportpkg.validate.plugins.spyre import is_spyre_device
+
+
+IOMMU_GROUPS_DIR = "/sys/kernel/iommu_groups"
+IRQ_DIR = "/proc/irq"
+
+
+def get_irq_affinity_path(irq):
+    """Returns the affinity list attribute of the IRQ"""
+
+    return "%s/%d/smp_affinity_list" % (IRQ_DIR, irq)
+
+
+def get_iommu_group_devices(iommu_group):
+    """Returns the sorted PCI addresses of the devices in the IOMMU
+    group"""
+
+    try:
+        return sorted(os.listdir(IOMMU_GROUPS_DIR + "/" + iommu_group +
+                                 "/devices"))
+    except OSError:
+        return []
+
+
+def generate_locality_check(self, pci_address):
+    """Generates a function that checks the IRQs of the given spyre card
+    are handled by the CPUs local to the card and the card does not share
+    its IOMMU group with other devices"""
+
+    def check():
+        card = get_spyre_cards().get(pci_address)
+        locality_check = DeviceCheck(check.__doc__, pci_address)
+
+        if card is None:
+            self.log.error("Spyre card %s not found", pci_address)
+            locality_check.set_status(False)
+            return locality_check
+
+        status = True
+
+        locality_check.add_attribute("numa_node", True, card.numa_node, None)
+        locality_check.add_attribute("local_cpulist", True,
+                                     card.local_cpulist, None)
+
+        local_cpus = parse_cpu_list(card.local_cpulist)
+        if card.numa_node is None or local_cpus is None:
+            self.log.debug("Spyre card %s is not attached to a NUMA node",
+                           pci_address)
+        else:
+            for irq in card.msi_irqs:
+                affinity = get_file_content(get_irq_affinity_path(irq))
+                irq_cpus = parse_cpu_list(affinity)
+                irq_status = irq_cpus is not None and irq_cpus <= local_cpus
+                if not irq_status:
+                    self.log.error("Spyre card %s IRQ %d is handled by CPUs "
+                                   "%s, local CPUs are %s", pci_address, irq,
+                                   affinity, card.local_cpulist)
+                    status = False
+                locality_check.add_attribute("irq %d" % irq, irq_status,
+                                             affinity, card.local_cpulist)
+
+        if card.iommu_group is not None:
+            shared_devices = \
+                [device for device in
+                 get_iommu_group_devices(card.iommu_group)
+                 if not is_spyre_device(PCI_DEVICES_DIR + "/" + device)]
+            if shared_devices:
+                self.log.error("Spyre card %s shares IOMMU group %s with %s",
+                               pci_address, card.iommu_group,
+                               ", ".join(shared_devices))
+                status = False
+            locality_check.add_attribute("iommu_group", not shared_devices,
+                                         shared_devices, [])
+
+        locality_check.set_status(status)
+        return locality_check
+
+    check.__doc__ = "Spyre card %s locality" % pci_address
+    return check
+
+
+def get_locality_check_method(pci_address):
+    """Returns the name of the locality check function of the spyre card"""
+
+    return "check_locality_" + re.sub(r"[^0-9a-zA-Z]", "_", pci_address)
+
+
+class SpyreLocality(Plugin, Scheme):
+    """Spyre NUMA, IOMMU and interrupt locality checks"""
+
+    def __init__(self):
+        Plugin.__init__(self)
+        self.name = SpyreLocality.__name__
+        self.description = SpyreLocality.__doc__
+        self.optional = True
+        self.refresh_inventory()
+
+    def refresh_inventory(self):
+        """Scan the spyre cards again and add the locality checks of the
+        new cards. Returns True if checks were added."""
+
+        added = False
+        for pci_address in get_spyre_cards(refresh=True):
+            check_method = get_locality_check_method(pci_address)
+            if not hasattr(self, check_method):
+                setattr(self, check_method,
+                        generate_locality_check(self, pci_address))
+                added = True
+
+        return added
+
+    def get_check_inputs(self):
+        """Returns the inputs of the locality checks"""
+
+        check_inputs = {}
+
+        for pci_address, card in get_spyre_cards().items():
+            inputs = [card.get_sysfs_path() + "/msi_irqs"]
+            inputs.extend(get_irq_affinity_path(irq) for irq in card.msi_irqs)
+            if card.iommu_group is not None:
+                inputs.append(IOMMU_GROUPS_DIR + "/" + card.iommu_group +
+                              "/devices")
+            check_inputs[get_locality_check_method(pci_address)] = inputs
+
+        return check_inputs
+
+    @classmethod
+    def is_valid(cls):
+        """Returns True if plugin is applicable otherwise False"""
+
+        return Spyre.is_spyre_card_exists()
@@ -8,6 +8,7 @@
 
 from servicereportpkg.logger import get_default_logger
 from servicereportpkg.utils import get_package_classes
+from servicereportpkg.timings import timed
 
 
 class Scheme(object):
@@ -28,8 +29,10 @@ class SchemeHandler(object):
 
     def __init__(self):
         self.log = get_default_logger()
-        self.populate_schemes()
-        self.populate_valid_schemes()
+        with timed("phase", "plugin discovery"):
+            self.populate_schemes()
+        with timed("phase", "scheme evaluation"):
+            self.populate_valid_schemes()
 
     def get_schemes(self):
         """Returns a list of all the schemes present in schemes package"""
@@ -56,5 +59,6 @@ class SchemeHandler(object):
         self.valid_schemes = []
 
         for scheme in self.schemes:
-            if scheme.is_valid():
-                self.valid_schemes.append(scheme)
+            with timed("scheme", scheme.__name__, trace_only=True):
+                if scheme.is_valid():
+                    self.valid_schemes.append(scheme)
@@ -0,0 +1,411 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Watch the inputs of the checks after a full validation and validate
+again only the checks whose inputs changed. Files and directories are
+watched with inotify, the sysfs and procfs nodes do not report changes
+and are polled."""
+
+
+import os
+import sys
+import time
+import errno
+import ctypes
+import select
+import signal
+import struct
+import ctypes.util
+
+from servicereportpkg.check import get_status_msg
+from servicereportpkg.global_context import TOOL_NAME
+from servicereportpkg.logger import get_default_logger, log_identifier
+from servicereportpkg.prometheus import write_prometheus_textfile
+
+
+# Seconds between two polls of the sysfs and procfs inputs
+WATCH_POLL_INTERVAL = 5
+
+# Seconds between two validations of the checks without inputs, e.g. a
+# service state, they spawn processes
+WATCH_CHECK_INTERVAL = 300
+
+# Seconds to wait for more events once an input changed, e.g. a package
+# manager transaction touches many files, at most WATCH_SETTLE_MAX seconds
+WATCH_SETTLE_TIME = 0.5
+WATCH_SETTLE_MAX = 10
+
+# Inputs in these pseudo file systems are polled
+POLLED_PREFIXES = ("/sys/", "/proc/")
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+# Changes of the entries of a watched directory and of the directory
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | \
+    IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | \
+    IN_ONLYDIR
+
+# struct inotify_event without the name that follows it
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class Inotify(object):
+    """inotify instance of the C library, called through ctypes"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                           use_errno=True)
+        self.inotify_add_watch = libc.inotify_add_watch
+        self.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                           ctypes.c_uint32]
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def fileno(self):
+        """Returns the file descriptor of the inotify instance"""
+
+        return self.fd
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        """Watch the directory, returns the watch descriptor"""
+
+        wd = self.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+
+        return wd
+
+    def read_events(self):
+        """Returns the list of (wd, mask, name) of the pending events"""
+
+        events = []
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError as os_error:
+                if os_error.errno == errno.EAGAIN:
+                    return events
+                raise
+
+            offset = 0
+            while offset < len(data):
+                (wd, mask, _, length) = \
+                    INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        """Close the inotify instance, removes all the watches"""
+
+        os.close(self.fd)
+
+
+def stop_watching(signum, frame):
+    """Signal handler, stops the watch loop"""
+
+    raise SystemExit(0)
+
+
+class Watcher(object):
+    """Validates again the checks whose inputs changed. A check is
+    validated again only if the fingerprint of its inputs differs from
+    the fingerprint recorded when the check was performed. The checks
+    without inputs, e.g. the state of a service, are validated again at
+    a longer interval."""
+
+    def __init__(self, validation_results, reporter, cmd_opts):
+        self.log = get_default_logger()
+        self.validation_results = validation_results
+        self.reporter = reporter
+        self.cmd_opts = cmd_opts
+        self.poll_interval = cmd_opts.watch_interval
+        self.check_interval = cmd_opts.watch_check_interval
+        # input path -> [(plugin name, plugin object, check method)]
+        self.inputs = {}
+        # [(plugin name, plugin object, check method)] without inputs
+        self.unwatched_checks = []
+        self.polled_paths = set()
+        self.inotify = None
+        # watch descriptor -> directory
+        self.watched_dirs = {}
+
+        self.collect_inputs()
+
+    def collect_inputs(self):
+        """Map every input to the checks evaluating it, the checks without
+        inputs are listed in unwatched_checks"""
+
+        self.inputs = {}
+        self.unwatched_checks = []
+
+        for plugin in self.validation_results:
+            for plugin_obj in self.validation_results[plugin]:
+                check_inputs = plugin_obj.get_check_inputs()
+                for check_method in plugin_obj.get_check_methods():
+                    paths = check_inputs.get(check_method)
+                    if not paths:
+                        self.unwatched_checks.append(
+                            (plugin, plugin_obj, check_method))
+                    for path in paths or []:
+                        self.inputs.setdefault(path, []).append(
+                            (plugin, plugin_obj, check_method))
+
+    def is_polled(self, path):
+        """Returns True if the input must be polled"""
+
+        return self.inotify is None or path.startswith(POLLED_PREFIXES)
+
+    def add_watches(self):
+        """Watch the directory of every input and every input that is a
+        directory. Inputs whose directory does not exist are polled."""
+
+        self.polled_paths = set()
+        watched = {}
+
+        for path in self.inputs:
+            if self.is_polled(path):
+                self.polled_paths.add(path)
+                continue
+
+            dirs = [os.path.dirname(path)]
+            if os.path.isdir(path):
+                dirs.append(path)
+
+            for directory in dirs:
+                if directory in watched:
+                    continue
+
+                try:
+                    watched[directory] = self.inotify.add_watch(directory)
+                except OSError as os_error:
+                    self.log.debug("Unable to watch %s, polling %s, error: "
+                                   "%s", directory, path, os_error)
+                    self.polled_paths.add(path)
+
+        self.watched_dirs = dict((wd, directory)
+                                 for directory, wd in watched.items())
+
+    def get_changed_paths(self, events):
+        """Returns the inputs changed by the inotify events, None if the
+        events were lost or a watched directory was removed"""
+
+        changed = set()
+
+        for (wd, mask, name) in events:
+            if mask & (IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF |
+                       IN_MOVE_SELF):
+                return None
+
+            directory = self.watched_dirs.get(wd)
+            if directory is None:
+                continue
+
+            entry = os.path.join(directory, name) if name else directory
+            if entry in self.inputs:
+                changed.add(entry)
+            if directory in self.inputs:
+                changed.add(directory)
+
+        return changed
+
+    def wait_for_changes(self, timeout):
+        """Wait up to timeout seconds for inotify events, returns the
+        changed inputs"""
+
+        if self.inotify is None:
+            time.sleep(timeout)
+            return set()
+
+        (ready, _, _) = select.select([self.inotify], [], [], timeout)
+        if not ready:
+            return set()
+
+        # Let the writer finish before validating
+        events = self.inotify.read_events()
+        settle_end = time.monotonic() + WATCH_SETTLE_MAX
+        while time.monotonic() < settle_end and \
+                select.select([self.inotify], [], [], WATCH_SETTLE_TIME)[0]:
+            events.extend(self.inotify.read_events())
+
+        changed = self.get_changed_paths(events)
+        if changed is None:
+            self.log.debug("inotify events lost, checking all the inputs")
+            self.add_watches()
+            return set(self.inputs)
+
+        return changed
+
+    def refresh_inventory(self, checks):
+        """Collect again the devices of the plugins of the given checks,
+        e.g. a spyre card may be gone or bound to another driver since
+        the validation. The checks of the new devices are added to the
+        given checks and their inputs are watched."""
+
+        refreshed = []
+        added = False
+        for (plugin, plugin_obj, check_method) in checks:
+            if plugin_obj in refreshed:
+                continue
+
+            refreshed.append(plugin_obj)
+            with log_identifier(TOOL_NAME + '.' + plugin.lower(),
+                                plugin=plugin):
+                try:
+                    added = plugin_obj.refresh_inventory() or added
+                except Exception as exception:
+                    self.log.error("Failed to refresh the inventory, "
+                                   "reason: %s", exception)
+
+        if not added:
+            return
+
+        self.collect_inputs()
+        self.add_watches()
+
+        for plugin in self.validation_results:
+            for plugin_obj in self.validation_results[plugin]:
+                if plugin_obj not in refreshed:
+                    continue
+
+                for check_method in plugin_obj.get_check_methods():
+                    check = (plugin, plugin_obj, check_method)
+                    if check not in checks and plugin_obj.get_check(
+                            getattr(plugin_obj, check_method).__doc__) is None:
+                        checks.append(check)
+
+    def revalidate(self, paths, unwatched_checks=()):
+        """Validate again the checks evaluating the given inputs if their
+        fingerprint changed, along with the given checks without inputs.
+        A check without inputs is reported only if its status changed.
+        Returns the number of checks reported."""
+
+        candidates = []
+        for path in sorted(paths):
+            for check in self.inputs.get(path, []):
+                if check not in candidates:
+                    candidates.append(check)
+        candidates.extend(unwatched_checks)
+
+        checks = []
+        for (plugin, plugin_obj, check_method) in candidates:
+            old_check = plugin_obj.get_check(
+                getattr(plugin_obj, check_method).__doc__)
+            if (plugin, plugin_obj, check_method) not in unwatched_checks \
+                    and old_check is not None and \
+                    old_check.get_fingerprint() == \
+                    plugin_obj.get_check_fingerprint(check_method):
+                continue
+
+            checks.append((plugin, plugin_obj, check_method))
+
+        self.refresh_inventory(checks)
+
+        revalidated = 0
+        for (plugin, plugin_obj, check_method) in checks:
+            check_name = getattr(plugin_obj, check_method).__doc__
+            old_check = plugin_obj.get_check(check_name)
+
+            with log_identifier(TOOL_NAME + '.' + plugin.lower(),
+                                plugin=plugin):
+                try:
+                    new_check = plugin_obj.revalidate_check(check_method)
+                except Exception as exception:
+                    self.log.error("Failed to verify %s reason: %s",
+                                   check_method, exception)
+                    continue
+
+                if new_check is None or new_check.get_name() is None:
+                    continue
+
+                if (plugin, plugin_obj, check_method) in unwatched_checks \
+                        and old_check is not None and \
+                        old_check.get_status() == new_check.get_status():
+                    continue
+
+                revalidated += 1
+                changed_inputs = sorted(
+                    path for path in paths
+                    if (plugin, plugin_obj, check_method) in
+                    self.inputs.get(path, []))
+                self.log.info("%s: %s -> %s, changed inputs: %s", check_name,
+                              get_status_msg(old_check.get_status()
+                                             if old_check else None),
+                              get_status_msg(new_check.get_status()),
+                              ", ".join(changed_inputs),
+                              extra={"sr_fields": {"check": check_name,
+                                                   "event": "check_changed"}})
+
+            self.reporter.check_changed(plugin, plugin_obj, old_check,
+                                        new_check, changed_inputs)
+
+        return revalidated
+
+    def run(self):
+        """Watch the inputs until the tool is interrupted or stopped"""
+
+        try:
+            self.inotify = Inotify()
+        except (OSError, AttributeError) as exception:
+            self.log.warning("inotify is not available, polling all the "
+                             "inputs, error: %s", exception)
+
+        self.add_watches()
+        signal.signal(signal.SIGTERM, stop_watching)
+
+        print("\nWatching %d inputs of the checks, %d polled every %d "
+              "seconds, %d checks without inputs validated every %d seconds"
+              % (len(self.inputs), len(self.polled_paths),
+                 self.poll_interval, len(self.unwatched_checks),
+                 self.check_interval))
+        sys.stdout.flush()
+
+        next_poll = time.monotonic() + self.poll_interval
+        next_check = time.monotonic() + self.check_interval
+        try:
+            while True:
+                changed = self.wait_for_changes(
+                    max(min(next_poll, next_check) - time.monotonic(), 0))
+
+                if time.monotonic() >= next_poll:
+                    changed |= self.polled_paths
+                    next_poll = time.monotonic() + self.poll_interval
+
+                unwatched_checks = []
+                if time.monotonic() >= next_check:
+                    unwatched_checks = list(self.unwatched_checks)
+                    next_check = time.monotonic() + self.check_interval
+
+                if (changed or unwatched_checks) and \
+                        self.revalidate(changed, unwatched_checks) and \
+                        self.cmd_opts.prometheus_textfile:
+                    write_prometheus_textfile(
+                        self.cmd_opts.prometheus_textfile,
+                        self.validation_results,
+                        self.reporter.plugin_durations)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.inotify is not None:
+                self.inotify.close()
+
+        return 0
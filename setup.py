@@ -20,7 +20,9 @@ setup(packages=find_packages(),
                   ('share/doc/ServiceReport', ['README.md']),
                   ('share/licenses/ServiceReport', ['COPYING']),
                   ('/usr/lib/systemd/system',
-                   ['service/servicereport.service'])],
+                   ['service/servicereport.service',
+                    'service/servicereport-query.service',
+                    'service/servicereport-query.socket'])],
       classifiers=[
           'Development Status :: 4 - Beta',
           'Programming Language :: Python'])
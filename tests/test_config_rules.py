@@ -0,0 +1,126 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Tests of the declarative configuration file rules"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from servicereportpkg.check import ConfigurationFileCheck
+from servicereportpkg.config_rules import ConfigFile, LineRule, LimitsRule
+from servicereportpkg.config_rules import ModprobeOptionRule, SysctlRule
+
+
+class ConfigRulesTest(unittest.TestCase):
+    """Parse, match and edit paths of the rule engine"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, "conf.d", "test.conf")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, data):
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        with open(self.file_path, "w", encoding="utf-8") as o_file:
+            o_file.write(data)
+
+    def read(self):
+        with open(self.file_path, "r", encoding="utf-8") as o_file:
+            return o_file.read()
+
+    def test_line_rule_ignores_whitespace(self):
+        rule = LineRule('SUBSYSTEM=="vfio", MODE="0660"')
+
+        self.assertEqual(rule.match('SUBSYSTEM=="vfio",   MODE="0660"'),
+                         rule.expected_value)
+        self.assertIsNone(rule.match('SUBSYSTEM=="vfio", MODE="0600"'))
+
+    def test_modprobe_option_rule(self):
+        rule = ModprobeOptionRule("vfio-pci", "ids", "1014:06a7")
+
+        self.assertEqual(rule.match("options vfio-pci disable_vga=1 "
+                                    "ids=1014:06a7"), "1014:06a7")
+        self.assertIsNone(rule.match("options vfio ids=1014:06a7"))
+        self.assertEqual(rule.get_line(), "options vfio-pci ids=1014:06a7")
+
+    def test_limits_rule_is_valid(self):
+        rule = LimitsRule("@sentient", "-", "memlock", 1024,
+                          is_valid=lambda value: int(value) >= 1024)
+
+        self.assertEqual(rule.match("@sentient - memlock 2048"), "2048")
+        self.assertIsNone(rule.match("@sentient soft memlock 2048"))
+        self.assertTrue(rule.is_satisfied("2048"))
+        self.assertFalse(rule.is_satisfied("512"))
+        self.assertFalse(rule.is_satisfied(None))
+
+    def test_sysctl_rule(self):
+        rule = SysctlRule("vm.nr_hugepages", 16)
+
+        self.assertEqual(rule.match("vm.nr_hugepages=16"), "16")
+        self.assertEqual(rule.match("-vm.nr_hugepages = 8"), "8")
+        self.assertIsNone(rule.match("vm.nr_hugepages_mempolicy = 16"))
+
+    def test_evaluate_last_value_wins(self):
+        rule = SysctlRule("vm.nr_hugepages", 16)
+        self.write("# vm.nr_hugepages = 16\nvm.nr_hugepages = 16\n"
+                   "vm.nr_hugepages = 4\n")
+
+        self.assertEqual(ConfigFile(self.file_path, [rule]).evaluate(),
+                         [(rule, "4")])
+
+    def test_evaluate_missing_file(self):
+        config_file = ConfigFile(self.file_path, [SysctlRule("a.b", 1)])
+
+        self.assertIsNone(config_file.evaluate())
+
+    def test_update_check(self):
+        rules = [LineRule("vfio-pci"), SysctlRule("vm.nr_hugepages", 16)]
+        self.write("vfio-pci\n")
+        conf_check = ConfigurationFileCheck("test", self.file_path)
+
+        self.assertFalse(ConfigFile(self.file_path, rules)
+                         .update_check(conf_check))
+        self.assertFalse(conf_check.get_status())
+        attributes = conf_check.get_config_attributes()
+        self.assertTrue(attributes["vfio-pci"]["status"])
+        self.assertFalse(attributes["vm.nr_hugepages"]["status"])
+
+    def test_missing_module_options_share_a_line(self):
+        rules = [ModprobeOptionRule("vfio-pci", "ids", "1014:06a7"),
+                 ModprobeOptionRule("vfio-pci", "disable_idle_d3", "1")]
+        config_file = ConfigFile(self.file_path, rules)
+
+        self.assertEqual(config_file.get_missing_lines(),
+                         ["options vfio-pci ids=1014:06a7 "
+                          "disable_idle_d3=1"])
+
+    def test_fix_creates_the_file(self):
+        config_file = ConfigFile(self.file_path, [LineRule("vfio-pci")])
+
+        self.assertTrue(config_file.fix())
+        self.assertEqual(self.read(), "vfio-pci\n")
+
+    def test_fix_appends_and_is_idempotent(self):
+        rules = [LineRule("vfio-pci"), SysctlRule("vm.nr_hugepages", 16)]
+        self.write("# keep\nvfio-pci")
+        config_file = ConfigFile(self.file_path, rules)
+
+        self.assertTrue(config_file.fix())
+        self.assertEqual(self.read(),
+                         "# keep\nvfio-pci\nvm.nr_hugepages = 16\n")
+        self.assertEqual(config_file.get_missing_lines(), [])
+
+        self.assertTrue(config_file.fix())
+        self.assertEqual(self.read(),
+                         "# keep\nvfio-pci\nvm.nr_hugepages = 16\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
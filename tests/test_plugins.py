@@ -0,0 +1,45 @@
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# (C) Copyright IBM Corp. 2018, 2026
+# Author: Sourabh Jain <sourabhjain@linux.ibm.com>
+
+"""Tests of the validation plugins"""
+
+
+import inspect
+import unittest
+
+from servicereportpkg.utils import get_package_classes
+from servicereportpkg.validate import plugins
+from servicereportpkg.validate.plugins import Plugin
+
+
+class CheckMethodsTest(unittest.TestCase):
+    """Plugin.validate calls every check_ method without arguments"""
+
+    def test_check_methods_take_no_arguments(self):
+        plugin_classes = [_class for _class in
+                          get_package_classes(plugins.__path__,
+                                              "servicereportpkg.validate."
+                                              "plugins.")
+                          if issubclass(_class, Plugin)]
+        self.assertTrue(plugin_classes)
+
+        for plugin_class in plugin_classes:
+            for name, method in inspect.getmembers(plugin_class,
+                                                   inspect.isfunction):
+                if not name.startswith("check_"):
+                    continue
+
+                required = [param for param in
+                            list(inspect.signature(method).parameters
+                                 .values())[1:]
+                            if param.default is param.empty and
+                            param.kind in (param.POSITIONAL_ONLY,
+                                           param.POSITIONAL_OR_KEYWORD)]
+                self.assertEqual(required, [], "%s.%s requires arguments"
+                                 % (plugin_class.__name__, name))
+
+
+if __name__ == "__main__":
+    unittest.main()